@@ -30,4 +30,48 @@ PSEUDOCODE = {
         "      dist[v] = dist[u]+w; PQ.push", 
         "return not found" 
     ]
-}
\ No newline at end of file
+}
+
+STEP_MESSAGES = {
+    'BFS': {
+        ('visit', 0): lambda s: "Bắt đầu BFS",
+        ('check_loop', 1): lambda s: "Kiểm tra hàng đợi",
+        ('processing', 2): lambda s: f"Lấy {s.u} ra",
+        ('visit', 3): lambda s: f"Đã tìm thấy {s.u}!",
+        ('check_edge', 4): lambda s: f"Xét {s.v}",
+        ('traverse', 6): lambda s: f"Duyệt cạnh ({s.u}, {s.v})",
+        ('visit', 6): lambda s: f"Thêm {s.u} vào Queue",
+        ('not_found', 7): lambda s: f"Không tìm thấy {s.v}!",
+    },
+    'DFS': {
+        ('processing', 1): lambda s: f"Xét đỉnh {s.u}",
+        ('visit', 2): lambda s: f"Tìm thấy đích {s.u}!" if s.value is not None else "Đã duyệt hết!",
+        ('check_edge', 3): lambda s: f"Xét {s.v}",
+        ('traverse', 5): lambda s: f"Đệ quy xuống {s.v}",
+        ('backtrack', 8): lambda s: f"Quay lui về {s.u}",
+        ('processing', 3): lambda s: f"Tiếp tục xét {s.u}",
+        ('check_edge', 7): lambda s: f"{s.v} đã thăm -> Bỏ qua",
+        ('visit', 8): lambda s: f"Duyệt xong {s.u}",
+        ('not_found', 8): lambda s: f"Không tìm thấy {s.v}!",
+    },
+    'Dijkstra': {
+        ('visit', 0): lambda s: "Khởi tạo",
+        ('check_loop', 1): lambda s: "Check PQ",
+        ('processing', 2): lambda s: f"Lấy {s.u} (d={s.value})",
+        ('visit', 4): lambda s: f"Đã tìm thấy {s.u}!",
+        ('check_edge', 5): lambda s: f"Xét {s.v} (w={s.value})",
+        ('traverse', 7): lambda s: f"Relax: {s.value[0]}->{s.value[1]}",
+        ('update_dist', 7): lambda s: "Push PQ",
+        ('not_found', 8): lambda s: f"Không tìm thấy {s.v}!",
+    }
+}
+
+PATH_MESSAGES = {
+    'highlight_path_node': lambda s: "Tô màu đường đi",
+    'highlight_path_edge': lambda s: f"Đường đi: {s.u} -> {s.v}",
+}
+
+def describe_step(algo, step):
+    if step.op in PATH_MESSAGES: return PATH_MESSAGES[step.op](step)
+    fmt = STEP_MESSAGES.get(algo, {}).get((step.op, step.line))
+    return fmt(step) if fmt else step.op
@@ -0,0 +1,166 @@
+import heapq
+import mmap
+import struct
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from csr import CSRAdjacency
+from snapshot import open_snapshot, temporary_snapshot
+
+# Layout: 32-byte header, then int64 sources[rows], int64 targets[cols]
+# and float64 distances[rows][cols] (inf = unreachable), little-endian.
+MAGIC = b'DIST'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIQQ')
+METHODS = ('auto', 'dijkstra', 'floyd')
+FLOYD_MAX_NODES = 2000
+FLOYD_MIN_DENSITY = 0.05
+INF = float('inf')
+
+def _le(data):
+    if sys.byteorder != 'little': data.byteswap()
+    return data
+
+def choose_method(method, n, nnz, negative=False):
+    # Floyd-Warshall is O(V^3) but vectorises over whole rows, so it beats
+    # V heap-based Dijkstras once the graph is small and dense enough
+    if method != 'auto': return method
+    if np is None or n > FLOYD_MAX_NODES: return 'dijkstra'
+    return 'floyd' if negative or n and nnz / (n * n) >= FLOYD_MIN_DENSITY else 'dijkstra'
+
+def distances(csr, s):
+    # Works on row indices straight off the CSR columns, so in workers the
+    # search reads the shared snapshot mapping and copies nothing per edge
+    offsets, targets, weights = csr.offsets, csr.targets, csr.weights
+    dist = [INF] * len(csr)
+    dist[s] = 0
+    pq = [(0, s)]
+    pop, push = heapq.heappop, heapq.heappush
+    while pq:
+        d, u = pop(pq)
+        if d > dist[u]: continue
+        a, b = offsets[u], offsets[u + 1]
+        for v, w in zip(targets[a:b], weights[a:b]):
+            nd = d + w
+            if nd < dist[v]:
+                dist[v] = nd
+                push(pq, (nd, v))
+    return dist
+
+def floyd_warshall(csr):
+    n = len(csr)
+    offsets = np.frombuffer(csr.offsets, dtype=np.int64)
+    dist = np.full((n, n), INF)
+    dist[np.repeat(np.arange(n), np.diff(offsets)), np.frombuffer(csr.targets, dtype=np.int64)] = np.asarray(csr.weights, dtype=float)
+    np.fill_diagonal(dist, np.minimum(dist.diagonal(), 0))
+    for k in range(n): np.minimum(dist, dist[:, k, None] + dist[k], out=dist)
+    return dist
+
+class DistanceMatrix:
+    # Rows are sources, columns every vertex; the data is an mmap view, so
+    # opening a saved matrix costs nothing until distances are read
+    def __init__(self, sources, targets, data, mm=None):
+        self.sources, self.targets, self.data, self.mm = sources, targets, data, mm
+        self.row_index = {v: i for i, v in enumerate(sources)}
+        self.col_index = {v: i for i, v in enumerate(targets)}
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, _, rows, cols = HEADER.unpack_from(mm)
+        if magic != MAGIC or version != VERSION: raise ValueError("File không phải ma trận khoảng cách (.dist) hợp lệ")
+        buf = memoryview(mm)
+        offset = HEADER.size
+        views = []
+        for count, typecode in ((rows, 'q'), (cols, 'q'), (rows * cols, 'd')):
+            view = buf[offset:offset + 8 * count].cast(typecode)
+            views.append(view if sys.byteorder == 'little' else _le(array(typecode, view)))
+            offset += 8 * count
+        return cls(*views, mm)
+
+    def distance(self, u, v):
+        return self.data[self.row_index[u] * len(self.targets) + self.col_index[v]]
+
+    def row(self, u):
+        start = self.row_index[u] * len(self.targets)
+        return dict(zip(self.targets, self.data[start:start + len(self.targets)]))
+
+    def close(self):
+        if self.mm is None: return
+        for view in (self.sources, self.targets, self.data):
+            if isinstance(view, memoryview): view.release()
+        self.mm.close()
+        self.mm = None
+
+# --- Workers open the graph snapshot read-only and write their rows straight
+# into the shared output file, so no distances travel back through pipes ---
+_worker = None
+
+def _init_worker(graph_path, out_path):
+    global _worker
+    graph, _ = open_snapshot(graph_path)
+    f = open(out_path, 'r+b')
+    _worker = graph.adj, mmap.mmap(f.fileno(), 0)
+    f.close()
+
+def _write_row(mm, offset, dist):
+    mm[offset:offset + 8 * len(dist)] = _le(array('d', dist)).tobytes()
+
+def _solve_rows(jobs):
+    csr, mm = _worker
+    for offset, s in jobs: _write_row(mm, offset, distances(csr, s))
+    return len(jobs)
+
+def _create(path, sources, targets):
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, 0, len(sources), len(targets)))
+        f.write(_le(array('q', sources)).tobytes())
+        f.write(_le(array('q', targets)).tobytes())
+        start = f.tell()
+        f.truncate(start + 8 * len(sources) * len(targets))
+    return start
+
+def all_pairs(graph, path, sources=None, workers=1, method='auto', progress=None):
+    # Writes distances from every vertex in `sources` (default: all) to every
+    # vertex into `path` and returns the opened DistanceMatrix.
+    # `progress(done, total)` is called as rows complete.
+    csr = graph.adj if graph.frozen else CSRAdjacency.from_adjacency(graph.adj)
+    if not all(isinstance(v, int) for v in csr.ids): raise ValueError("Ma trận khoảng cách chỉ hỗ trợ đỉnh là số nguyên")
+    sources = list(csr.ids) if sources is None else [v for v in sources if v in csr.index]
+    negative = csr.nnz and min(csr.weights) < 0
+    method = choose_method(method, len(csr), csr.nnz, negative)
+    if method == 'dijkstra' and negative: raise ValueError("Dijkstra cần trọng số không âm, hãy dùng method='floyd'")
+    start = _create(path, sources, csr.ids)
+    stride = 8 * len(csr)
+    jobs = [(start + r * stride, csr.index[s]) for r, s in enumerate(sources)]
+
+    if method == 'floyd':
+        dist = floyd_warshall(csr)
+        with open(path, 'r+b') as f:
+            f.seek(start)
+            dist[[s for _, s in jobs]].astype('<f8').tofile(f)
+        if progress: progress(len(jobs), len(jobs))
+    elif workers <= 1:
+        with open(path, 'r+b') as f, mmap.mmap(f.fileno(), 0) as mm:
+            for done, (offset, s) in enumerate(jobs, 1):
+                _write_row(mm, offset, distances(csr, s))
+                if progress and done % 64 == 0: progress(done, len(jobs))
+        if progress: progress(len(jobs), len(jobs))
+    else:
+        # Several chunks per worker keep the pool busy when rows differ in cost
+        size = max(1, len(jobs) // (workers * 8))
+        with temporary_snapshot(graph) as graph_path, \
+                ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(graph_path, path)) as pool:
+            futures = [pool.submit(_solve_rows, jobs[i:i + size]) for i in range(0, len(jobs), size)]
+            done = 0
+            for future in as_completed(futures):
+                done += future.result()
+                if progress: progress(done, len(jobs))
+    return DistanceMatrix.open(path)
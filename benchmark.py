@@ -0,0 +1,386 @@
+import math
+import os
+import random
+import sys
+import time
+
+import layout
+import loader
+import spatial
+from graph import Graph
+
+def read_edges(path):
+    edges = []
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2: edges.append((int(parts[0]), int(parts[1]), int(parts[2]) if len(parts) > 2 else 1))
+    return edges
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+def report(label, seconds):
+    print(f"  {label:<40} {seconds * 1000:10.2f} ms")
+
+def bench_expansion(path='graph_1000.txt'):
+    edges = read_edges(path)
+    g = Graph()
+    for u, v, w in edges: g.add_edge(u, v, w)
+    frozen = Graph()
+    frozen.load_edges(edges)
+
+    def expand_sorted(adj):
+        for u in adj:
+            for v, w in sorted(adj[u], key=lambda x: x[0]): pass
+
+    def expand_direct(adj):
+        for u in adj:
+            for v, w in adj[u]: pass
+
+    print(f"Mở rộng toàn bộ đỉnh ({path}: {len(g.adj)} đỉnh, {len(edges)} cạnh)")
+    report("sorted() mỗi lần mở rộng (cũ)", timed(lambda: expand_sorted(g.adj)))
+    report("danh sách kề đã sắp xếp", timed(lambda: expand_direct(g.adj)))
+    report("CSR (freeze)", timed(lambda: expand_direct(frozen.adj)))
+    for algo in ('bfs_fast', 'dfs_fast', 'dijkstra_fast'):
+        report(f"{algo}(1) toàn đồ thị", timed(lambda: (g.touch(), getattr(g, algo)(1))))
+
+def random_graph(n, degree=5, seed=0):
+    rng = random.Random(seed)
+    return list(range(1, n + 1)), [(rng.randint(1, n), rng.randint(1, n), 1) for _ in range(n * degree // 2)]
+
+def bench_layout(sizes=(100, 1000, 5000), iterations=3):
+    print(f"Force layout (ms / vòng lặp, {iterations} vòng)")
+    for n in sizes:
+        nodes, edges = random_graph(n)
+        report(f"{n} đỉnh - Python", timed(lambda: layout.force_layout_python(nodes, edges, iterations, seed=1), repeat=1) / iterations)
+        if layout.np is None: continue
+        report(f"{n} đỉnh - NumPy", timed(lambda: layout.force_layout_numpy(nodes, edges, iterations, seed=1), repeat=3) / iterations)
+
+def bench_layout_modes(sizes=(1000, 5000, 10000, 20000, 50000), iterations=50, exact_limit=5000):
+    import tracemalloc
+    print(f"Force layout chính xác vs Barnes–Hut ({iterations} vòng): thời gian, bộ nhớ đỉnh, CV độ dài cạnh, tỉ lệ giao cắt")
+    for n in sizes:
+        nodes, edges = random_graph(n)
+        for method in ('exact', 'barnes_hut'):
+            if method == 'exact' and n > exact_limit: continue
+            tracemalloc.start()
+            t = time.perf_counter()
+            positions = layout.force_layout(nodes, edges, iterations, seed=1, method=method)
+            elapsed = time.perf_counter() - t
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            quality = layout.layout_quality(positions, edges)
+            print(f"  {n:>6} đỉnh {method:<10} {elapsed:8.2f} s  {peak / 2**20:6.0f} MB   CV {quality['edge_cv']:.3f}   giao cắt {quality['crossing_rate']:.2%}")
+
+def write_edge_file(path, n, m, seed=0):
+    rng = random.Random(seed)
+    with open(path, 'w') as f:
+        f.write(f"{n} {m}\n")
+        for _ in range(m): f.write(f"{rng.randint(1, n)} {rng.randint(1, n)} {rng.randint(1, 100)}\n")
+
+def bench_loader(path='/tmp/edges_2m.txt', n=200000, m=2000000):
+    if not os.path.exists(path): write_edge_file(path, n, m)
+
+    def load_lines():
+        with open(path) as f: lines = [line.strip() for line in f if line.strip()]
+        edges = [tuple(map(int, line.split())) for line in lines[1:]]
+        Graph().load_edges(edges)
+
+    print(f"Nạp file {path} ({m} cạnh)")
+    report("đọc hết dòng + map(int) (cũ)", timed(load_lines, repeat=1))
+    report("loader.load_graph", timed(lambda: loader.load_graph(path), repeat=1))
+
+def bench_picking(sizes=(1000, 10000, 50000), queries=2000, scan_queries=50):
+    print(f"Chọn đỉnh / cạnh theo toạ độ (µs / lần; lưới {queries} lần, quét tuyến tính {scan_queries} lần)")
+    for n in sizes:
+        rng = random.Random(n)
+        scale = math.sqrt(n / 1000)
+        width, height = layout.WIDTH * scale, layout.HEIGHT * scale
+        points = {v: (rng.uniform(0, width), rng.uniform(0, height)) for v in range(n)}
+        # One edge per vertex to a point up to 100 px away; every third one curved
+        edges = []
+        for v, (x, y) in points.items():
+            x2, y2 = x + rng.uniform(-100, 100), y + rng.uniform(-100, 100)
+            line = spatial.quad_points(x, y, (x + x2) / 2 + 30, (y + y2) / 2, x2, y2) if v % 3 == 0 else [(x, y), (x2, y2)]
+            edges.append((v, None, line))
+        vertex_grid, edge_grid = spatial.SpatialGrid(), spatial.SpatialGrid()
+        for v, (x, y) in points.items(): vertex_grid.insert(v, [(x - 24, y - 24, x + 24, y + 24)])
+        for i, (u, v, line) in enumerate(edges): edge_grid.insert(i, spatial.polyline_boxes(line, 6))
+        probes = [(rng.uniform(0, width), rng.uniform(0, height)) for _ in range(queries)]
+
+        def scan():
+            for x, y in probes[:scan_queries]:
+                next((v for v, (vx, vy) in points.items() if (x - vx)**2 + (y - vy)**2 <= 576), None)
+                next((i for i, (u, v, line) in enumerate(edges) if spatial.polyline_distance(x, y, line) <= 6), None)
+
+        def grid():
+            for x, y in probes:
+                next((v for v in vertex_grid.query(x, y) if (x - points[v][0])**2 + (y - points[v][1])**2 <= 576), None)
+                next((i for i in edge_grid.query(x, y) if spatial.polyline_distance(x, y, edges[i][2]) <= 6), None)
+
+        print(f"  {n:>6} đỉnh, {len(edges)} cạnh: quét tuyến tính {timed(scan, repeat=1) / scan_queries * 1e6:10.1f} µs, lưới {timed(grid, repeat=3) / queries * 1e6:8.1f} µs")
+
+def grid_graph(n, degree=5, spacing=60, seed=0):
+    # Jittered square grid with edges to nearby grid neighbours, like a laid-out graph
+    rng = random.Random(seed)
+    side = math.ceil(math.sqrt(n))
+    positions = {v: ((v % side) * spacing + rng.uniform(-15, 15), (v // side) * spacing + rng.uniform(-15, 15)) for v in range(1, n + 1)}
+    edges = set()
+    while len(edges) < n * degree:
+        u = rng.randint(1, n)
+        v = u + rng.randint(-3, 3) + side * rng.randint(-3, 3)
+        if 1 <= v <= n and u != v: edges.add((min(u, v), max(u, v), 1))
+    return positions, list(edges)
+
+def bench_render(sizes=((1000, 5000), (10000, 50000)), frames=5):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    import gui
+    print(f"Dựng cảnh và thời gian khung hình (tốt nhất trong {frames} khung, khung nhìn 1200x800)")
+    for n, m in sizes:
+        positions, edges = grid_graph(n, m // n)
+        for batch in (False, True):
+            w = gui.GraphSimulator()
+            w.view.resize(1200, 800)
+            w.graph.load_edges(edges, vertices=positions)
+            w.vertex_positions = dict(positions)
+            threshold = gui.BATCH_THRESHOLD
+            gui.BATCH_THRESHOLD = 0 if batch else float('inf')
+            t = time.perf_counter()
+            w.redraw()
+            build = time.perf_counter() - t
+            gui.BATCH_THRESHOLD = threshold
+            label = 'gộp (LOD)' if batch else 'từng item'
+            w.view.fitInView(w.scene.itemsBoundingRect(), gui.Qt.KeepAspectRatio)
+            overview = timed(lambda: w.view.viewport().grab(), repeat=frames)
+            w.view.resetTransform()
+            w.view.centerOn(*positions[n // 2])
+            zoomed = timed(lambda: w.view.viewport().grab(), repeat=frames)
+            print(f"  {n:>6} đỉnh / {len(edges):>6} cạnh, {label:<10}: dựng {build * 1000:9.1f} ms, toàn cảnh {overview * 1000:8.1f} ms/khung, phóng to {zoomed * 1000:7.1f} ms/khung")
+            w.close()
+
+def bench_highlight(n=1000, degree=5):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    import gui
+    positions, edges = grid_graph(n, degree)
+    print(f"Tô màu khi chạy lại vết BFS ({n} đỉnh, {len(edges)} cạnh, không ghi bảng bước)")
+    for directed in (False, True):
+        w = gui.GraphSimulator()
+        w.graph.directed = directed
+        w.graph.load_edges(edges, vertices=positions)
+        w.vertex_positions = dict(positions)
+        w.redraw()
+        steps = list(w.graph.iter_bfs(1))
+
+        def replay():
+            w.clear_highlights()
+            for step in steps: w.apply_step(step)
+
+        seconds = timed(replay, repeat=3)
+        print(f"  {'có hướng' if directed else 'vô hướng':<10} {len(steps):>6} bước: {seconds * 1000:9.1f} ms, {len(steps) / seconds:10.0f} bước/s")
+        w.close()
+
+def bench_step_log(sizes=(10000, 100000), table_limit=20000):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem
+    app = QApplication.instance() or QApplication([])
+    import gui
+    from steps import Step
+    ops = ('processing', 'check_edge', 'traverse', 'visit')
+    print("Ghi bảng bước, xử lý sự kiện sau mỗi bước (ms / 1000 bước)")
+    for n in sizes:
+        steps = [Step(ops[i % 4], i, i + 1, line=[2, 4, 6, 6][i % 4]) for i in range(n)]
+        if n <= table_limit:
+            table = QTableWidget(0, 2)
+            table.show()
+
+            def widget_rows():
+                for step in steps:
+                    row = table.rowCount()
+                    table.insertRow(row)
+                    bg, fg = gui.step_colors(step.op)
+                    for col, text in enumerate((step.op, gui.describe_step('BFS', step))):
+                        item = QTableWidgetItem(text)
+                        item.setBackground(bg); item.setForeground(fg)
+                        table.setItem(row, col, item)
+                    table.scrollToBottom()
+                    app.processEvents()
+
+            report(f"{n} bước - QTableWidget (cũ)", timed(widget_rows, repeat=1) / n * 1000)
+            table.close()
+        model = gui.StepLogModel()
+        view = gui.QTableView()
+        view.setModel(model)
+        view.verticalHeader().setSectionResizeMode(gui.QHeaderView.Fixed)
+        model.rowsInserted.connect(view.scrollToBottom)
+        view.show()
+
+        def model_rows():
+            model.clear('BFS')
+            for step in steps:
+                model.append(step)
+                app.processEvents()
+            model.flush()
+            app.processEvents()
+
+        report(f"{n} bước - StepLogModel", timed(model_rows, repeat=1) / n * 1000)
+        view.close()
+
+def bench_seek(n=5000, seeks=200):
+    from steps import StepStream, TraceReplay, TraceTimeline, step_highlights
+    positions, edges = grid_graph(n)
+    g = Graph()
+    g.load_edges(edges, vertices=positions)
+    timeline = TraceTimeline(StepStream(g.iter_dijkstra(1)), 'Dijkstra')
+    total = timeline.load(float('inf'))
+    rng = random.Random(0)
+    targets = [rng.randrange(total) for _ in range(seeks)]
+
+    def from_start():
+        for k in targets[:seeks // 10]:
+            modes, replay = {}, TraceReplay('Dijkstra')
+            for step in timeline.steps[:k]:
+                for kind, key, mode in step_highlights(step): modes[kind, key] = mode
+                replay.apply(step)
+
+    timeline.seek(total)
+    print(f"Nhảy tới bước bất kỳ trong vết Dijkstra ({total} bước, {len(timeline.checkpoints)} điểm lưu)")
+    report("phát lại từ bước 0", timed(from_start, repeat=1) / (seeks // 10))
+    report("từ điểm lưu gần nhất", timed(lambda: [timeline.seek(k) for k in targets], repeat=1) / seeks)
+
+def bench_import_gui(n=2000, path='/tmp/grid_2000.txt'):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    import tempfile
+    from PyQt5.QtCore import QEventLoop, QTimer
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    import gui
+    positions, edges = grid_graph(n)
+    with open(path, 'w') as f: f.writelines(f"{u} {v} {w}\n" for u, v, w in edges)
+    w = gui.GraphSimulator()
+    w.show()
+    w.layout_cache = layout.LayoutCache(tempfile.mkdtemp())
+    information, gui.QMessageBox.information = gui.QMessageBox.information, lambda *args: None
+    ticks = []
+    timer = QTimer()
+    loop = QEventLoop()
+    timer.timeout.connect(lambda: ticks.append(time.perf_counter()) if w.task else loop.quit())
+    timer.start(16)
+    t = time.perf_counter()
+    w.run_task("benchmark", w.finish_import, w.load_graph_file, path, False, 'auto')
+    loop.exec_()
+    elapsed = time.perf_counter() - t
+    gaps = [b - a for a, b in zip([t] + ticks, ticks)]
+    print(f"Nhập + dàn trang {n} đỉnh trong nền (GUI trước đây đứng hình suốt thời gian này)")
+    report("tổng thời gian", elapsed)
+    report("khoảng dừng dài nhất khi đang chạy nền", max(gaps, default=elapsed))
+    gui.QMessageBox.information = information
+    timer.stop()
+    w.close()
+
+def bench_queries(path='graph_1000.txt', count=2000, workers=(1, 2, 4)):
+    import cli
+    rng = random.Random(0)
+    queries = [(rng.randint(1, 1000), rng.randint(1, 1000), algo) for algo in cli.ALGORITHMS for _ in range(count // 3)]
+    print(f"Truy vấn không giao diện trên {path} ({len(queries)} truy vấn BFS/DFS/Dijkstra, {os.cpu_count()} nhân CPU)")
+    frozen = loader.load_graph(path)
+    t = time.perf_counter()
+    for query in queries[::10]: cli.answer(frozen, query)
+    print(f"  {'CSR (không thaw)':<40} {len(queries[::10]) / (time.perf_counter() - t):10.0f} truy vấn/s")
+    for n in workers:
+        graph = loader.load_graph(path)
+        t = time.perf_counter()
+        for result in cli.run_queries(graph, queries, n): pass
+        print(f"  {f'{n} tiến trình':<40} {len(queries) / (time.perf_counter() - t):10.0f} truy vấn/s")
+
+def bench_result_cache(path='graph_1000.txt', sources=10, queries=3000):
+    g = Graph()
+    g.load_edges(read_edges(path))
+    g.thaw()
+    rng = random.Random(0)
+    pairs = [(rng.randint(1, sources), rng.randint(1, 1000)) for _ in range(queries)]
+
+    def run(cold):
+        for s, t in pairs:
+            if cold: g.touch()
+            g.find_path('dijkstra', s, t)
+
+    print(f"find_path (Dijkstra) lặp lại từ {sources} nguồn, đích ngẫu nhiên ({path}, mỗi truy vấn)")
+    report("không cache (mỗi truy vấn tính lại)", timed(lambda: run(True), repeat=1) / queries)
+    g.result_hits = g.result_misses = 0
+    report("cache theo nguồn", timed(lambda: run(False), repeat=1) / queries)
+    print(f"  tỉ lệ trúng {g.cache_info()['hit_rate']:.1%}")
+
+def bench_dynamic(n=100000, edits=200):
+    nodes, edges = random_graph(n)
+    rng = random.Random(1)
+    g = Graph()
+    for u, v, w in edges: g.add_edge(u, v, rng.randint(1, 100))
+    existing = list(g.edges())
+
+    def edit(i):
+        u, v, w = existing[i]
+        if i % 3 == 0: g.remove_edge(u, v)
+        elif i % 3 == 1: g.add_edge(u, v, rng.randint(1, 100))
+        else: g.add_edge(rng.randint(1, n), rng.randint(1, n), rng.randint(1, 100))
+
+    print(f"Sửa một cạnh rồi hỏi lại Dijkstra từ đỉnh 1 ({n} đỉnh, {len(existing)} cạnh, {edits} lần sửa: xoá / đổi trọng số / thêm)")
+    picks = rng.sample(range(len(existing)), 2 * edits)
+    for repair in (False, True):
+        g.repair_paths = repair
+        g.search('dijkstra', 1)
+        t = time.perf_counter()
+        for i in picks[repair * edits:(repair + 1) * edits]:
+            edit(i)
+            g.search('dijkstra', 1)
+        report("sửa cục bộ (dynamic)" if repair else "tính lại từ đầu", (time.perf_counter() - t) / edits)
+
+def bench_apsp(sizes=(1000, 10000), sources=500, workers=(1, 2, 4), dense=300):
+    import apsp
+    print(f"Khoảng cách nhiều nguồn ({sources} nguồn, {os.cpu_count()} nhân CPU)")
+    for n in sizes:
+        nodes, edges = random_graph(n)
+        g = Graph()
+        g.load_edges([(u, v, random.Random(u * n + v).randint(1, 100)) for u, v, w in edges], vertices=nodes)
+        for k in workers:
+            t = time.perf_counter()
+            apsp.all_pairs(g, '/tmp/bench.dist', nodes[:sources], k, 'dijkstra').close()
+            report(f"{n} đỉnh - Dijkstra, {k} tiến trình", time.perf_counter() - t)
+    if apsp.np is None: return
+    rng = random.Random(0)
+    g = Graph()
+    g.load_edges([(u, v, rng.randint(1, 100)) for u in range(dense) for v in range(u + 1, dense) if rng.random() < 0.3])
+    print(f"Toàn bộ cặp, đồ thị dày {dense} đỉnh ({g.adj.nnz / dense ** 2:.0%} mật độ)")
+    for method in ('dijkstra', 'floyd'):
+        report(method, timed(lambda: apsp.all_pairs(g, '/tmp/bench.dist', method=method).close(), repeat=1))
+    os.remove('/tmp/bench.dist')
+
+BENCHMARKS = {
+    'expansion': bench_expansion,
+    'layout': bench_layout,
+    'layout_modes': bench_layout_modes,
+    'loader': bench_loader,
+    'picking': bench_picking,
+    'render': bench_render,
+    'highlight': bench_highlight,
+    'step_log': bench_step_log,
+    'seek': bench_seek,
+    'import_gui': bench_import_gui,
+    'queries': bench_queries,
+    'apsp': bench_apsp,
+    'dynamic': bench_dynamic,
+    'result_cache': bench_result_cache,
+}
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or list(BENCHMARKS):
+        BENCHMARKS[name]()
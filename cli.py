@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from apsp import METHODS, DistanceMatrix, all_pairs
+from graph import RESULT_CACHE_SIZE
+from loader import load_graph
+from snapshot import open_snapshot, temporary_snapshot
+
+ALGORITHMS = ('bfs', 'dfs', 'dijkstra')
+BATCH_SIZE = 256
+THAW_LIMIT = 1 << 22
+
+def prepare(graph):
+    # Plain neighbour lists traverse about 3x faster than CSR views, which
+    # pays for the copy once many queries run against the same graph
+    if graph.frozen and graph.adj.nnz <= THAW_LIMIT: graph.thaw()
+    return graph
+
+def answer(graph, query):
+    # query is (source, target, algo) or an error dict from parse_queries
+    if isinstance(query, dict): return query
+    source, target, algo = query
+    result = {'source': source, 'target': target, 'algo': algo}
+    missing = [v for v in (source, target) if v not in graph.adj]
+    if missing:
+        result['error'] = f"Không có đỉnh {missing[0]}"
+        return result
+    path, cost = graph.find_path(algo, source, target)
+    result.update(found=bool(path), cost=cost, path=path)
+    return result
+
+def parse_queries(lines, default_algo='dijkstra'):
+    # One query per line: "source target [bfs|dfs|dijkstra]"; blank lines and # comments are skipped
+    for number, line in enumerate(lines, 1):
+        parts = line.split('#', 1)[0].split()
+        if not parts: continue
+        try:
+            if len(parts) not in (2, 3): raise ValueError
+            source, target = int(parts[0]), int(parts[1])
+            algo = parts[2].lower() if len(parts) == 3 else default_algo
+            if algo not in ALGORITHMS: raise ValueError
+        except ValueError:
+            yield {'line': number, 'error': f"Truy vấn không hợp lệ: {line.strip()}"}
+            continue
+        yield source, target, algo
+
+# --- The text file is parsed once; worker processes map a snapshot of it
+# instead of re-parsing the file or unpickling the graph ---
+_graph = None
+
+def _init_worker(path, cache_size):
+    global _graph
+    _graph = prepare(open_snapshot(path)[0])
+    _graph.result_capacity = cache_size
+
+def _answer_batch(queries):
+    return [answer(_graph, query) for query in queries]
+
+def batches(queries, size=BATCH_SIZE):
+    queries = iter(queries)
+    while batch := list(islice(queries, size)): yield batch
+
+def run_queries(graph, queries, workers=1, snapshot_path=None, cache_size=RESULT_CACHE_SIZE):
+    # Yields results in query order; at most 2 batches per worker are in
+    # flight, so queries streamed from stdin are never all held at once
+    if workers <= 1:
+        prepare(graph)
+        graph.result_capacity = cache_size
+        for query in queries: yield answer(graph, query)
+        return
+    if snapshot_path is None:
+        with temporary_snapshot(graph) as path:
+            yield from run_queries(graph, queries, workers, path, cache_size)
+        return
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(snapshot_path, cache_size)) as pool:
+        pending = deque()
+        for batch in batches(queries):
+            pending.append(pool.submit(_answer_batch, batch))
+            if len(pending) >= 2 * workers: yield from pending.popleft().result()
+        while pending: yield from pending.popleft().result()
+
+def open_graph(path, directed=False):
+    if path.endswith('.grph'): return open_snapshot(path)[0]
+    return load_graph(path, directed)
+
+def cmd_query(args):
+    graph = open_graph(args.graph, args.directed)
+    snapshot_path = args.graph if args.graph.endswith('.grph') else None
+    source = open(args.queries) if args.queries != '-' else sys.stdin
+    count = 0
+    start = time.perf_counter()
+    try:
+        for result in run_queries(graph, parse_queries(source, args.algo), args.workers, snapshot_path, args.cache):
+            sys.stdout.write(json.dumps(result, ensure_ascii=False) + '\n')
+            count += 1
+    finally:
+        if source is not sys.stdin: source.close()
+    elapsed = time.perf_counter() - start
+    print(f"{count} truy vấn trong {elapsed:.3f} s ({count / elapsed if elapsed else 0:.0f} truy vấn/s, {args.workers} tiến trình)", file=sys.stderr)
+    # Worker processes keep their own caches, so only the in-process run can report on it
+    if args.workers <= 1:
+        info = graph.cache_info()
+        print(f"Bộ nhớ đệm nguồn: {info['hits']} trúng / {info['misses']} trượt ({info['hit_rate']:.0%}), {info['size']}/{info['capacity']} mục", file=sys.stderr)
+
+def read_vertices(path):
+    with open(path) as f: return [int(token) for line in f for token in line.split('#', 1)[0].split()]
+
+def cmd_apsp(args):
+    graph = open_graph(args.graph, args.directed)
+    sources = read_vertices(args.sources) if args.sources else None
+    start = time.perf_counter()
+    matrix = all_pairs(graph, args.output, sources, args.workers, args.method)
+    elapsed = time.perf_counter() - start
+    rows = len(matrix.sources)
+    print(f"{rows} x {len(matrix.targets)} khoảng cách trong {elapsed:.3f} s ({rows / elapsed if elapsed else 0:.0f} nguồn/s, {args.workers} tiến trình) -> {args.output}", file=sys.stderr)
+
+def cmd_dist(args):
+    matrix = DistanceMatrix.open(args.matrix)
+    source = open(args.queries) if args.queries != '-' else sys.stdin
+    try:
+        for query in parse_queries(source):
+            if not isinstance(query, dict):
+                u, v, _ = query
+                query = {'source': u, 'target': v}
+                if u not in matrix.row_index or v not in matrix.col_index: query['error'] = f"Không có đỉnh {v if u in matrix.row_index else u} trong ma trận"
+                else:
+                    cost = matrix.distance(u, v)
+                    query.update(found=cost != float('inf'), cost=cost if cost != float('inf') else None)
+            sys.stdout.write(json.dumps(query, ensure_ascii=False) + '\n')
+    finally:
+        if source is not sys.stdin: source.close()
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Chạy thuật toán đồ thị không cần giao diện")
+    commands = parser.add_subparsers(dest='command', required=True)
+    query = commands.add_parser('query', help="Trả lời các truy vấn (nguồn, đích, thuật toán), mỗi dòng một kết quả JSON")
+    query.add_argument('graph', help="File danh sách cạnh / ma trận kề hoặc snapshot .grph")
+    query.add_argument('queries', nargs='?', default='-', help="File truy vấn (mặc định: stdin)")
+    query.add_argument('--directed', action='store_true', help="Đồ thị có hướng")
+    query.add_argument('--algo', choices=ALGORITHMS, default='dijkstra', help="Thuật toán khi dòng truy vấn không ghi rõ")
+    query.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1, help="Số tiến trình (mặc định: số nhân CPU)")
+    query.add_argument('--cache', type=int, default=RESULT_CACHE_SIZE, help="Số nguồn giữ kết quả tìm kiếm trong bộ nhớ đệm (mỗi tiến trình)")
+    query.set_defaults(run=cmd_query)
+    apsp = commands.add_parser('apsp', help="Tính ma trận khoảng cách từ nhiều nguồn (mặc định: mọi đỉnh) và lưu ra file .dist")
+    apsp.add_argument('graph', help="File danh sách cạnh / ma trận kề hoặc snapshot .grph")
+    apsp.add_argument('output', help="File ma trận khoảng cách (.dist)")
+    apsp.add_argument('--sources', help="File chứa các đỉnh nguồn")
+    apsp.add_argument('--directed', action='store_true', help="Đồ thị có hướng")
+    apsp.add_argument('--method', choices=METHODS, default='auto', help="auto: Floyd-Warshall cho đồ thị nhỏ và dày, còn lại Dijkstra từng nguồn")
+    apsp.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1, help="Số tiến trình cho Dijkstra (mặc định: số nhân CPU)")
+    apsp.set_defaults(run=cmd_apsp)
+    dist = commands.add_parser('dist', help="Tra khoảng cách trong file .dist, mỗi dòng truy vấn 'nguồn đích'")
+    dist.add_argument('matrix', help="File ma trận khoảng cách (.dist)")
+    dist.add_argument('queries', nargs='?', default='-', help="File truy vấn (mặc định: stdin)")
+    dist.set_defaults(run=cmd_dist)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.run(args)
+
+if __name__ == '__main__':
+    main()
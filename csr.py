@@ -0,0 +1,122 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def _typecode(values):
+    return 'q' if all(isinstance(x, int) for x in values) else 'd'
+
+def _to_array(values):
+    if values.dtype.kind in 'iub': return array('q', values.astype(np.int64).tobytes())
+    return array('d', values.astype(np.float64).tobytes())
+
+class CSRNeighbors(Sequence):
+    __slots__ = ('csr', 'start', 'stop')
+
+    def __init__(self, csr, start, stop):
+        self.csr, self.start, self.stop = csr, start, stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice): return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0: i += len(self)
+        if not 0 <= i < len(self): raise IndexError(i)
+        csr = self.csr
+        return csr.ids[csr.targets[self.start + i]], csr.weights[self.start + i]
+
+    def __iter__(self):
+        # By index rather than over slices: a paused traversal then holds no
+        # buffer of a mapped snapshot, and follows the columns if they are swapped
+        csr = self.csr
+        for i in range(self.start, self.stop): yield csr.ids[csr.targets[i]], csr.weights[i]
+
+    def __repr__(self):
+        return repr(list(self))
+
+class CSRAdjacency(Mapping):
+    # Read-only adjacency in compressed sparse row form: row i holds the
+    # neighbours of ids[i] in targets/weights[offsets[i]:offsets[i+1]],
+    # each row's targets stored as sorted row indices.
+    def __init__(self, ids, offsets, targets, weights):
+        self.ids = ids
+        self.index = {v: i for i, v in enumerate(ids)}
+        self.offsets, self.targets, self.weights = offsets, targets, weights
+
+    @classmethod
+    def from_rows(cls, rows):
+        try: ids = sorted(rows)
+        except TypeError: ids = list(rows)
+        index = {v: i for i, v in enumerate(ids)}
+        offsets, targets, weight_list = array('q', [0]), array('q'), []
+        for u in ids:
+            for j, w in sorted((index[v], w) for v, w in rows[u].items()):
+                targets.append(j)
+                weight_list.append(w)
+            offsets.append(len(targets))
+        weights = array(_typecode(weight_list), weight_list)
+        if _typecode(ids) == 'q': ids = array('q', ids)
+        return cls(ids, offsets, targets, weights)
+
+    @classmethod
+    def from_adjacency(cls, adj):
+        return cls.from_rows({u: dict(adj[u]) for u in adj})
+
+    @classmethod
+    def from_edges(cls, edges, directed=False, vertices=(), base=None):
+        rows = {u: dict(base[u]) for u in base} if base else {}
+        for u in vertices: rows.setdefault(u, {})
+        for u, v, w in edges:
+            rows.setdefault(u, {})[v] = w
+            if directed: rows.setdefault(v, {})
+            else: rows.setdefault(v, {})[u] = w
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_arrays(cls, src, dst, weights, directed=False, vertices=()):
+        # Vectorised from_edges for NumPy integer id arrays; as with the dict
+        # rows, a later duplicate (u, v) overwrites the earlier weight.
+        m = len(src)
+        ids, inverse = np.unique(np.concatenate((src, dst, np.asarray(list(vertices), dtype=src.dtype))), return_inverse=True)
+        rows, cols = inverse[:m], inverse[m:2 * m]
+        if not directed:
+            rows, cols = np.column_stack((rows, cols)).ravel(), np.column_stack((cols, rows)).ravel()
+            weights = np.repeat(weights, 2)
+        key = rows * len(ids) + cols
+        order = np.argsort(key, kind='stable')
+        key = key[order]
+        order = order[np.append(key[1:] != key[:-1], True)]
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(rows[order], minlength=len(ids)))))
+        return cls(_to_array(ids), _to_array(offsets), _to_array(cols[order]), _to_array(weights[order]))
+
+    def weight(self, u, v):
+        i, j = self.index.get(u), self.index.get(v)
+        if i is None or j is None: return None
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        k = bisect_left(self.targets, j, lo, hi)
+        return self.weights[k] if k < hi and self.targets[k] == j else None
+
+    def to_adjacency(self):
+        return {u: list(self[u]) for u in self.ids}
+
+    def __getitem__(self, u):
+        i = self.index[u]
+        return CSRNeighbors(self, self.offsets[i], self.offsets[i + 1])
+
+    def __contains__(self, u):
+        return u in self.index
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nnz(self):
+        return len(self.targets)
@@ -1,46 +1,196 @@
 import heapq
-from collections import deque
+from bisect import bisect_left, insort
+from collections import OrderedDict, deque
+
+from csr import CSRAdjacency
+from steps import Step
+
+RESULT_CACHE_SIZE = 16
 
 class Graph:
     def __init__(self):
         self.adj = {}
         self.directed = False
+        self.edge_weights = {}
+        # Single-source search results, keyed by (algo, source, version, directed);
+        # version is bumped by every mutation, so stale entries never match
+        self.version = 0
+        self.results = OrderedDict()
+        self.result_capacity = RESULT_CACHE_SIZE
+        self.result_hits = self.result_misses = 0
+        # Edge edits repair completed Dijkstra results instead of dropping them;
+        # in_adj is the reverse adjacency that directed repairs need, built lazily
+        self.repair_paths = True
+        self.in_adj = None
+
+    @property
+    def frozen(self):
+        return isinstance(self.adj, CSRAdjacency)
+
+    def freeze(self):
+        if not self.frozen:
+            self.adj = CSRAdjacency.from_adjacency(self.adj)
+            self.edge_weights = {}
+
+    def thaw(self):
+        if self.frozen:
+            self.adj = self.adj.to_adjacency()
+            self.rebuild_edge_index()
+
+    def touch(self):
+        self.version += 1
+        self.results.clear()
+        self.in_adj = None
+
+    def edit(self, arcs):
+        # arcs: (u, v, old, new) per changed directed entry, None meaning absent
+        kept = [(key, entry) for key, entry in self.results.items()
+                if self.repair_paths and key[0] == 'dijkstra' and len(entry[0]) == len(entry[1][0])]
+        self.version += 1
+        self.results.clear()
+        if self.in_adj is not None:
+            for u, v, old, new in arcs:
+                if new is None: self.in_adj[v].pop(u, None)
+                else: self.in_adj.setdefault(v, {})[u] = new
+        # Repairs run in place on the cached maps; callers only ever got copies
+        for (algo, start_node, _, directed), (done, result, steps) in kept:
+            for u, v, old, new in arcs: self._repair_dijkstra(done, *result, u, v, old, new)
+            # The paused generator's heap no longer matches dist, so it is not resumed
+            self.results[(algo, start_node, self.version, directed)] = done, result, iter(())
+
+    def in_edges(self, v):
+        if not self.directed: return self.adj[v]
+        if self.in_adj is None:
+            self.in_adj = {u: {} for u in self.adj}
+            for (a, b), w in self.edge_weights.items(): self.in_adj[b][a] = w
+        return self.in_adj[v].items()
+
+    def cache_info(self):
+        total = self.result_hits + self.result_misses
+        return {'hits': self.result_hits, 'misses': self.result_misses, 'hit_rate': self.result_hits / total if total else 0.0,
+                'size': len(self.results), 'capacity': self.result_capacity}
+
+    def load_edges(self, edges, vertices=()):
+        self.touch()
+        base = self.adj if self.adj else None
+        self.adj = CSRAdjacency.from_edges(edges, self.directed, vertices, base)
+        self.edge_weights = {}
+
+    def load_arrays(self, src, dst, weights, vertices=()):
+        if self.adj: return self.load_edges(zip(src.tolist(), dst.tolist(), weights.tolist()), vertices)
+        self.touch()
+        self.adj = CSRAdjacency.from_arrays(src, dst, weights, self.directed, vertices)
+        self.edge_weights = {}
+
+    def edges(self):
+        # Each undirected edge is reported once, from the endpoint seen first
+        seen = set()
+        for u in self.adj:
+            for v, w in self.adj[u]:
+                if not self.directed:
+                    if (v, u) in seen: continue
+                    seen.add((u, v))
+                yield u, v, w
+
+    def clear(self):
+        self.touch()
+        self.adj = {}
+        self.edge_weights = {}
+
+    def rebuild_edge_index(self):
+        self.edge_weights = {(u, v): w for u in self.adj for v, w in self.adj[u]}
+
+    def weight(self, u, v):
+        if self.frozen: return self.adj.weight(u, v)
+        return self.edge_weights.get((u, v))
+
+    def has_edge(self, u, v):
+        return self.weight(u, v) is not None
 
     def add_vertex(self, u):
-        if u not in self.adj: self.adj[u] = []
+        self.thaw()
+        if u not in self.adj:
+            self.adj[u] = []
+            if self.in_adj is not None: self.in_adj[u] = {}
+            self.edit(())
+
+    # Neighbour lists are kept sorted, so entries for v start at bisect_left((v,)).
+    def _neighbor_range(self, u, v):
+        lst = self.adj[u]
+        i = j = bisect_left(lst, (v,))
+        while j < len(lst) and lst[j][0] == v: j += 1
+        return i, j
+
+    def _set_weight(self, u, v, w):
+        i, j = self._neighbor_range(u, v)
+        self.adj[u][i:j] = [(v, w)] * (j - i)
+        self.edge_weights[(u, v)] = w
+
+    def _remove_neighbor(self, u, v):
+        i, j = self._neighbor_range(u, v)
+        del self.adj[u][i:j]
 
     def add_edge(self, u, v, w=1):
+        self.thaw()
         if u not in self.adj: self.add_vertex(u)
         if v not in self.adj: self.add_vertex(v)
-        for i, (neighbor, weight) in enumerate(self.adj[u]):
-            if neighbor == v:
-                self.adj[u][i] = (v, w)
-                if not self.directed:
-                    for j, (n2, w2) in enumerate(self.adj[v]):
-                        if n2 == u: self.adj[v][j] = (u, w)
-                return
-        self.adj[u].append((v, w))
-        if not self.directed: self.adj[v].append((u, w))
+        if (u, v) in self.edge_weights:
+            arcs = [(u, v, self.edge_weights[(u, v)], w)]
+            self._set_weight(u, v, w)
+            if not self.directed and (v, u) in self.edge_weights:
+                arcs.append((v, u, self.edge_weights[(v, u)], w))
+                self._set_weight(v, u, w)
+            return self.edit(arcs)
+        insort(self.adj[u], (v, w))
+        self.edge_weights[(u, v)] = w
+        arcs = [(u, v, None, w)]
+        if not self.directed:
+            insort(self.adj[v], (u, w))
+            self.edge_weights[(v, u)] = w
+            arcs.append((v, u, None, w))
+        self.edit(arcs)
 
     def remove_edge(self, u, v):
-        if u in self.adj: self.adj[u] = [(n, w) for n, w in self.adj[u] if n != v]
-        if not self.directed and v in self.adj: self.adj[v] = [(n, w) for n, w in self.adj[v] if n != u]
+        self.thaw()
+        arcs = []
+        for a, b in ((u, v),) if self.directed else ((u, v), (v, u)):
+            old = self.edge_weights.pop((a, b), None)
+            if old is None: continue
+            self._remove_neighbor(a, b)
+            arcs.append((a, b, old, None))
+        if arcs: self.edit(arcs)
 
-    def get_path_str(self, parent_map, current):
+    def remove_vertex(self, v):
+        self.thaw()
+        if v not in self.adj: return
+        self.touch()
+        for n, w in self.adj.pop(v):
+            self.edge_weights.pop((v, n), None)
+        for u in self.adj:
+            if self.edge_weights.pop((u, v), None) is not None: self._remove_neighbor(u, v)
+
+    def get_path_from_parent(self, parent_map, end):
         path = []
-        curr = current
+        curr = end
         while curr is not None:
-            path.append(str(curr))
-            curr = parent_map.get(curr)
-        return " -> ".join(reversed(path))
+            path.append(curr)
+            curr = parent_map[curr]
+        path.reverse()
+        return path
 
-    def add_path_highlight_steps(self, steps, path_nodes, path_str):
+    def iter_path_highlight(self, path_nodes):
         if not path_nodes: return
-        steps.append(('highlight_path_node', path_nodes[0], None, "Tô màu đường đi", path_str, "Hoàn tất", -1))
+        yield Step('highlight_path_node', path_nodes[0])
         for i in range(len(path_nodes) - 1):
             u, v = path_nodes[i], path_nodes[i+1]
-            steps.append(('highlight_path_edge', u, v, f"Đường đi: {u} -> {v}", path_str, "Hoàn tất", -1))
-            steps.append(('highlight_path_node', v, None, "Tô màu đường đi", path_str, "Hoàn tất", -1))
+            yield Step('highlight_path_edge', u, v)
+            yield Step('highlight_path_node', v)
+
+    def collect_steps(self, step_iter):
+        steps = []
+        while True:
+            try: steps.append(next(step_iter))
+            except StopIteration as stop: return steps, stop.value
 
     def calculate_cost_from_parent(self, parent, start, end):
         cost = 0
@@ -48,158 +198,299 @@ class Graph:
         while curr != start:
             p = parent.get(curr)
             if p is None: return 0
-            w_found = 0
-            if p in self.adj:
-                for v, w in self.adj[p]:
-                    if v == curr: w_found = w; break
-            cost += w_found
+            cost += self.weight(p, curr) or 0
             curr = p
         return cost
 
     def calculate_cost_from_stack(self, stack):
         cost = 0
         for i in range(len(stack) - 1):
-            u, v = stack[i], stack[i+1]
-            if u in self.adj:
-                for neighbor, w in self.adj[u]:
-                    if neighbor == v: cost += w; break
+            cost += self.weight(stack[i], stack[i+1]) or 0
         return cost
 
     def bfs(self, start_node, end_node=None):
-        steps = []
+        return self.collect_steps(self.iter_bfs(start_node, end_node))
+
+    def dfs(self, start_node, end_node=None):
+        return self.collect_steps(self.iter_dfs(start_node, end_node))
+
+    def dijkstra(self, start_node, end_node=None):
+        return self.collect_steps(self.iter_dijkstra(start_node, end_node))
+
+    # --- Step generators (return the path cost) ---
+    def iter_bfs(self, start_node, end_node=None):
         visited = set()
         queue = deque([start_node])
         visited.add(start_node)
         parent = {start_node: None}
-        
-        queue_str = f"[{start_node}]"
-        path_str = str(start_node)
-        
-        steps.append(('visit', start_node, None, f"Bắt đầu BFS", path_str, queue_str, 0))
+
+        yield Step('visit', start_node, line=0)
 
         while queue:
-            steps.append(('check_loop', None, None, "Kiểm tra hàng đợi", path_str, str(list(queue)), 1))
+            yield Step('check_loop', line=1)
             u = queue.popleft()
-            path_str = self.get_path_str(parent, u)
-            steps.append(('processing', u, None, f"Lấy {u} ra", path_str, str(list(queue)), 2))
-            
+            yield Step('processing', u, line=2)
+
             if end_node is not None:
                 if u == end_node:
-                    steps.append(('visit', u, None, f"Đã tìm thấy {u}!", path_str, "[]", 3))
-                    final_path = []
-                    curr = end_node
-                    while curr is not None:
-                        final_path.append(curr)
-                        curr = parent[curr]
-                    final_path.reverse()
-                    self.add_path_highlight_steps(steps, final_path, path_str)
-                    cost = self.calculate_cost_from_parent(parent, start_node, end_node)
-                    return steps, cost
+                    yield Step('visit', u, line=3)
+                    yield from self.iter_path_highlight(self.get_path_from_parent(parent, end_node))
+                    return self.calculate_cost_from_parent(parent, start_node, end_node)
 
             if u in self.adj:
-                sorted_neighbors = sorted(self.adj[u])
-                for v, w in sorted_neighbors:
-                    steps.append(('check_edge', u, v, f"Xét {v}", path_str, str(list(queue)), 4))
+                for v, w in self.adj[u]:
+                    yield Step('check_edge', u, v, line=4)
                     if v not in visited:
                         visited.add(v)
                         parent[v] = u
                         queue.append(v)
-                        steps.append(('traverse', u, v, f"Duyệt cạnh ({u}, {v})", path_str, str(list(queue)), 6))
-                        steps.append(('visit', v, None, f"Thêm {v} vào Queue", path_str, str(list(queue)), 6))
-        
-        if end_node: steps.append(('not_found', start_node, None, f"Không tìm thấy {end_node}!", path_str, "[]", 7))
-        return steps, 0
+                        yield Step('traverse', u, v, line=6)
+                        yield Step('visit', v, line=6)
 
-    def dfs(self, start_node, end_node=None):
-        steps = []
+        if end_node: yield Step('not_found', start_node, end_node, line=7)
+        return 0
+
+    def iter_dfs(self, start_node, end_node=None):
         visited = set()
-        path_stack = [] 
+        path_stack = []
+        neighbor_iters = []
         total_nodes = len(self.adj)
+        u = start_node
+        found = False
 
-        def get_path_str_dfs(): return " -> ".join(map(str, path_stack))
-
-        def _dfs_recursive(u):
+        # Explicit stack: path_stack[i] is expanded by neighbor_iters[i]
+        while True:
             visited.add(u)
             path_stack.append(u)
-            steps.append(('processing', u, None, f"Xét đỉnh {u}", get_path_str_dfs(), str(path_stack), 1))
-            
+            yield Step('processing', u, line=1)
+
             is_target_found = (end_node is not None and u == end_node)
             is_all_visited = (end_node is None and len(visited) == total_nodes)
 
             if is_target_found or is_all_visited:
-                msg = f"Tìm thấy đích {u}!" if is_target_found else "Đã duyệt hết!"
-                steps.append(('visit', u, None, msg, get_path_str_dfs(), "Hoàn tất", 2))
-                return True 
+                yield Step('visit', u, value=end_node, line=2)
+                found = True
+                break
 
-            if u in self.adj:
-                sorted_neighbors = sorted(self.adj[u], key=lambda x: x[0])
-                for v, w in sorted_neighbors:
-                    steps.append(('check_edge', u, v, f"Xét {v}", get_path_str_dfs(), str(path_stack), 3))
+            neighbor_iters.append(iter(self.adj[u]) if u in self.adj else iter(()))
+            descend = False
+            while neighbor_iters:
+                top = path_stack[-1]
+                for v, w in neighbor_iters[-1]:
+                    yield Step('check_edge', top, v, line=3)
                     if v not in visited:
-                        steps.append(('traverse', u, v, f"Đệ quy xuống {v}", get_path_str_dfs(), str(path_stack), 5))
-                        if _dfs_recursive(v): return True
-                        steps.append(('backtrack', u, v, f"Quay lui về {u}", get_path_str_dfs(), str(path_stack), 8))
-                        steps.append(('processing', u, None, f"Tiếp tục xét {u}", get_path_str_dfs(), str(path_stack), 3))
-                    else:
-                        steps.append(('check_edge', u, v, f"{v} đã thăm -> Bỏ qua", get_path_str_dfs(), str(path_stack), 7))
-            
-            path_stack.pop()
-            steps.append(('visit', u, None, f"Duyệt xong {u}", get_path_str_dfs(), str(path_stack), 8))
-            return False
-
-        found = _dfs_recursive(start_node)
-        
-        cost = 0
+                        yield Step('traverse', top, v, line=5)
+                        u, descend = v, True
+                        break
+                    yield Step('check_edge', top, v, line=7)
+                if descend: break
+                neighbor_iters.pop()
+                path_stack.pop()
+                yield Step('visit', top, line=8)
+                if path_stack:
+                    yield Step('backtrack', path_stack[-1], top, line=8)
+                    yield Step('processing', path_stack[-1], line=3)
+            if not descend: break
+
         if found:
-            self.add_path_highlight_steps(steps, path_stack, get_path_str_dfs())
-            cost = self.calculate_cost_from_stack(path_stack)
-        elif end_node is not None:
-            steps.append(('not_found', start_node, None, f"Không tìm thấy {end_node}!", "[]", "[]", 8))
-            
-        return steps, cost
+            yield from self.iter_path_highlight(path_stack)
+            return self.calculate_cost_from_stack(path_stack)
+        if end_node is not None:
+            yield Step('not_found', start_node, end_node, line=8)
+        return 0
 
-    def dijkstra(self, start_node, end_node=None):
-        steps = []
-        dist = {node: float('inf') for node in self.adj}
-        dist[start_node] = 0
+    def iter_dijkstra(self, start_node, end_node=None):
+        inf = float('inf')
+        dist = {start_node: 0}
         pq = [(0, start_node)]
         parent = {start_node: None}
-        
-        def get_pq_str(): return str([(d,n) for d,n in sorted(pq)])
 
-        steps.append(('visit', start_node, 0, f"Khởi tạo", str(start_node), get_pq_str(), 0))
+        yield Step('visit', start_node, value=0, line=0)
 
         while pq:
-            steps.append(('check_loop', None, None, "Check PQ", self.get_path_str(parent, pq[0][1] if pq else None), get_pq_str(), 1))
+            yield Step('check_loop', line=1)
             d, u = heapq.heappop(pq)
-            path_str = self.get_path_str(parent, u)
-            steps.append(('processing', u, None, f"Lấy {u} (d={d})", path_str, get_pq_str(), 2))
-            
+            yield Step('processing', u, value=d, line=2)
+
             if d > dist[u]: continue
-            
+
             if end_node is not None and u == end_node:
-                steps.append(('visit', u, None, f"Đã tìm thấy {u}!", path_str, "[]", 4))
-                final_path = []
-                curr = end_node
-                while curr is not None:
-                    final_path.append(curr)
-                    curr = parent[curr]
-                final_path.reverse()
-                self.add_path_highlight_steps(steps, final_path, path_str)
-                return steps, d
+                yield Step('visit', u, line=4)
+                yield from self.iter_path_highlight(self.get_path_from_parent(parent, end_node))
+                return d
 
             if u in self.adj:
-                for v, weight in sorted(self.adj[u], key=lambda x: x[0]):
-                    steps.append(('check_edge', u, v, f"Xét {v} (w={weight})", path_str, get_pq_str(), 5))
-                    if dist[u] + weight < dist[v]:
-                        old = dist[v]
+                for v, weight in self.adj[u]:
+                    yield Step('check_edge', u, v, weight, line=5)
+                    old = dist.get(v, inf)
+                    if dist[u] + weight < old:
                         dist[v] = dist[u] + weight
                         heapq.heappush(pq, (dist[v], v))
                         parent[v] = u
-                        steps.append(('traverse', u, v, f"Relax: {old}->{dist[v]}", path_str, get_pq_str(), 7))
-                        steps.append(('update_dist', v, dist[v], f"Push PQ", path_str, get_pq_str(), 7))
-        
+                        yield Step('traverse', u, v, (old, dist[v]), line=7)
+                        yield Step('update_dist', v, value=dist[v], line=7)
+
         if end_node is not None:
-            steps.append(('not_found', start_node, None, f"Không tìm thấy {end_node}!", path_str, "[]", 8))
-            
-        return steps, 0
\ No newline at end of file
+            yield Step('not_found', start_node, end_node, line=8)
+        return 0
+
+    # --- Fast path (no trace): searches are memoised per source and paused
+    # as soon as the target is settled, so a later target from the same source
+    # either walks its parent chain or resumes the search where it stopped.
+    # search() returns the cached maps themselves, which later queries grow and
+    # edits repair in place; *_fast hand out copies, find_path only the path. ---
+    def search(self, algo, start_node, end_node=None):
+        key = (algo, start_node, self.version, self.directed)
+        entry = self.results.get(key)
+        if entry is not None:
+            self.result_hits += 1
+            self.results.move_to_end(key)
+        else:
+            self.result_misses += 1
+            entry = self.results[key] = getattr(self, '_search_' + algo)(start_node)
+            if len(self.results) > self.result_capacity: self.results.popitem(last=False)
+        settled, result, steps = entry
+        if end_node is None or end_node not in settled:
+            for v in steps:
+                if v == end_node: break
+        return result
+
+    # Each _search_* returns (settled, result, steps): steps yields every
+    # vertex as it becomes final, and settled is the map or set holding them
+    def _search_bfs(self, start_node):
+        parent = {start_node: None}
+
+        def steps():
+            queue = deque([start_node])
+            while queue:
+                u = queue.popleft()
+                if u in self.adj:
+                    for v, w in self.adj[u]:
+                        if v not in parent:
+                            parent[v] = u
+                            queue.append(v)
+                            yield v
+        return parent, parent, steps()
+
+    def _search_dfs(self, start_node):
+        parent = {start_node: None}
+
+        def steps():
+            path_stack = [start_node]
+            total_nodes = len(self.adj)
+            iters = [iter(self.adj[start_node] if start_node in self.adj else ())]
+            while iters and len(parent) < total_nodes:
+                for v, w in iters[-1]:
+                    if v not in parent:
+                        parent[v] = path_stack[-1]
+                        path_stack.append(v)
+                        iters.append(iter(self.adj[v] if v in self.adj else ()))
+                        yield v
+                        break
+                else:
+                    iters.pop()
+                    path_stack.pop()
+        return parent, parent, steps()
+
+    def _search_dijkstra(self, start_node):
+        inf = float('inf')
+        dist = {start_node: 0}
+        parent = {start_node: None}
+        done = set()
+
+        def steps():
+            pq = [(0, start_node)]
+            while pq:
+                d, u = heapq.heappop(pq)
+                if d > dist[u]: continue
+                if u in self.adj:
+                    for v, weight in self.adj[u]:
+                        nd = d + weight
+                        if nd < dist.get(v, inf):
+                            dist[v] = nd
+                            parent[v] = u
+                            heapq.heappush(pq, (nd, v))
+                # Yielded once its edges are relaxed, so a paused search with
+                # every reached vertex settled has nothing left to do
+                done.add(u)
+                yield u
+        return done, (dist, parent), steps()
+
+    # --- Dynamic repair of a completed Dijkstra result after arc (u, v) changed
+    # weight from old to new (None = absent); only the affected region is visited ---
+    def _repair_dijkstra(self, done, dist, parent, u, v, old, new):
+        inf = float('inf')
+        old = inf if old is None else old
+        new = inf if new is None else new
+        if new < old:
+            # Decrease or insert: relax outwards from v, as in Dijkstra
+            d = dist.get(u, inf) + new
+            if d >= dist.get(v, inf): return
+            dist[v], parent[v] = d, u
+            pq = [(d, v)]
+            while pq:
+                d, x = heapq.heappop(pq)
+                if d > dist[x]: continue
+                done.add(x)
+                for y, w in self.adj[x]:
+                    nd = d + w
+                    if nd < dist.get(y, inf):
+                        dist[y], parent[y] = nd, x
+                        heapq.heappush(pq, (nd, y))
+        elif new > old and v in parent and parent[v] == u:
+            # Increase or delete of a tree arc: v's subtree loses its distances,
+            # is reseeded from its unaffected in-neighbours and re-settled alone
+            affected, stack = {v}, [v]
+            while stack:
+                x = stack.pop()
+                for y, w in self.adj[x]:
+                    if y not in affected and parent.get(y) == x:
+                        affected.add(y)
+                        stack.append(y)
+            for y in affected:
+                del dist[y], parent[y]
+                done.discard(y)
+            pq = []
+            for y in affected:
+                best = min(((dist[x] + w, x) for x, w in self.in_edges(y) if x in dist and x not in affected), default=None)
+                if best is None: continue
+                dist[y], parent[y] = best
+                pq.append((best[0], y))
+            heapq.heapify(pq)
+            while pq:
+                d, x = heapq.heappop(pq)
+                if d > dist[x]: continue
+                done.add(x)
+                for y, w in self.adj[x]:
+                    nd = d + w
+                    if y in affected and nd < dist.get(y, inf):
+                        dist[y], parent[y] = nd, x
+                        heapq.heappush(pq, (nd, y))
+
+    def find_path(self, algo, start_node, end_node):
+        # (path, cost) to end_node without copying the cached maps
+        result = self.search(algo, start_node, end_node)
+        parent = result[1] if algo == 'dijkstra' else result
+        if end_node not in parent: return [], 0
+        path = self.get_path_from_parent(parent, end_node)
+        if algo == 'dijkstra': return path, result[0][end_node]
+        if algo == 'dfs': return path, self.calculate_cost_from_stack(path)
+        return path, self.calculate_cost_from_parent(parent, start_node, end_node)
+
+    def bfs_fast(self, start_node, end_node=None):
+        parent = self.search('bfs', start_node, end_node)
+        if end_node is None or end_node not in parent: return dict(parent), [], 0
+        return dict(parent), self.get_path_from_parent(parent, end_node), self.calculate_cost_from_parent(parent, start_node, end_node)
+
+    def dfs_fast(self, start_node, end_node=None):
+        # Without a target, the path is the DFS branch that reached the last vertex
+        parent = self.search('dfs', start_node, end_node)
+        if end_node is None: end_node = next(reversed(parent)) if len(parent) == len(self.adj) else None
+        if end_node is None or end_node not in parent: return dict(parent), [], 0
+        path = self.get_path_from_parent(parent, end_node)
+        return dict(parent), path, self.calculate_cost_from_stack(path)
+
+    def dijkstra_fast(self, start_node, end_node=None):
+        dist, parent = self.search('dijkstra', start_node, end_node)
+        if end_node is None or end_node not in dist: return dict(dist), dict(parent), [], 0
+        return dict(dist), dict(parent), self.get_path_from_parent(parent, end_node), dist[end_node]
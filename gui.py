@@ -1,18 +1,26 @@
 import sys
 import math
-import random
+import time
 import traceback
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QWidget, 
+from array import array
+from functools import lru_cache
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QWidget, QGraphicsItem, 
                             QVBoxLayout, QHBoxLayout, QLabel, QComboBox, 
-                            QTableWidget, QTableWidgetItem, QGraphicsView, 
+                            QTableWidget, QTableWidgetItem, QTableView, QGraphicsView, 
                             QGraphicsScene, QHeaderView, QMessageBox, QInputDialog,
-                            QSlider, QGroupBox, QListWidget, QSplitter, 
-                            QTabWidget, QFileDialog, QGridLayout, QTextEdit)
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QPen, QBrush, QColor, QLinearGradient, QFont, QPainter, QPainterPath
+                            QSlider, QSpinBox, QGroupBox, QListWidget, QSplitter, 
+                            QTabWidget, QFileDialog, QGridLayout, QTextEdit, QProgressBar)
+from PyQt5.QtCore import Qt, QTimer, QRectF, QPointF, QLineF, QAbstractTableModel, QModelIndex, QThreadPool
+from PyQt5.QtGui import QPen, QBrush, QColor, QGradient, QLinearGradient, QFont, QPainter, QPainterPath, QPolygonF
 
 from graph import Graph
-from algorithms import PSEUDOCODE
+from loader import load_graph, save_edge_list, save_matrix
+from snapshot import close_snapshot, open_snapshot, save_snapshot
+from layout import layout_quality, layout_key, seed_from_key, resolve_method, LayoutCache, LAYOUT_METHODS
+from algorithms import PSEUDOCODE, describe_step
+from steps import Step, StepStream, TraceTimeline, step_highlights
+from spatial import SpatialGrid, quad_points, polyline_boxes, polyline_distance
+from workers import Task, LayoutPool
 
 STYLESHEET = """
     QMainWindow { background-color: #f0f2f5; }
@@ -37,96 +45,378 @@ STYLESHEET = """
     }
 """
 
+EDGE_PICK_TOLERANCE = 6
+# Level of detail: above BATCH_THRESHOLD vertices + edges the scene holds one
+# BatchGraphItem; labels/weights/arrows are painted only when at most
+# LABEL_BUDGET vertices are exposed, and item-mode text hides below LABEL_SCALE.
+BATCH_THRESHOLD = 10000
+LABEL_BUDGET = 600
+LABEL_SCALE = 0.6
+NODE_STYLES = {'processing': ('#ffeb3b', '#d84315'), 'visited': ('#CFD8DC', 'black'),
+               'target': ('#f44336', 'white'), 'path': ('#43A047', 'white')}
+
+# Qt copies pens/brushes by reference count, so one instance per style is
+# shared by every item instead of being rebuilt on each highlight change
+@lru_cache(maxsize=None)
+def color(name):
+    return QColor(name)
+
+@lru_cache(maxsize=None)
+def pen(name, width, cap=Qt.SquareCap):
+    return QPen(color(name), width, Qt.SolidLine, cap)
+
+@lru_cache(maxsize=None)
+def brush(name):
+    return QBrush(color(name))
+
+@lru_cache(maxsize=None)
+def font(size):
+    return QFont("Arial", size, QFont.Bold)
+
+# The gradient is relative to each ellipse's own rect, so it survives moves unchanged
+@lru_cache(maxsize=None)
+def node_brush():
+    grad = QLinearGradient(0, 0, 1, 1)
+    grad.setCoordinateMode(QGradient.ObjectBoundingMode)
+    grad.setColorAt(0, color('#42a5f5')); grad.setColorAt(1, color('#1976d2'))
+    return QBrush(grad)
+
+STEP_COLORS = {'processing': ('#FFF9C4', '#F57F17'), 'visit': ('#C8E6C9', '#2E7D32'), 'traverse': ('#E1F5FE', '#0277BD'),
+               'check_edge': ('#F5F5F5', '#616161'), 'update_dist': ('#FFE0B2', '#E65100'), 'backtrack': ('#F8BBD0', '#C2185B'),
+               'check_loop': ('#ECEFF1', '#546E7A'), 'not_found': ('#FFCDD2', '#B71C1C')}
+LOG_FLUSH_MS = 50
+SEEK_REPAINT_ALL = 256
+# Seeks that would pull more than this many new steps run on a worker thread
+BACKGROUND_STEPS = 20000
+
+@lru_cache(maxsize=None)
+def step_colors(step_type):
+    if step_type in STEP_COLORS: bg, fg = STEP_COLORS[step_type]
+    elif 'highlight_path' in step_type: bg, fg = '#B9F6CA', '#1B5E20'
+    elif step_type.startswith('cache'): bg, fg = '#EDE7F6', '#4527A0'
+    else: bg, fg = 'white', 'black'
+    return brush(bg), brush(fg)
+
+def edge_style(mode):
+    return ('#ff9800', 4) if mode == 'highlight' else ('#2962FF', 5) if mode == 'path' else ('#90A4AE', 2)
+
+def edge_pen(mode):
+    return pen(*edge_style(mode))
+
 class NodeItem:
     def __init__(self, v, x, y, r=24):
         self.v, self.x, self.y, self.r = v, x, y, r
         self.ellipse, self.label = None, None
+        self.mode = 'normal'
 
     def add_to_scene(self, scene):
-        grad = QLinearGradient(self.x-self.r, self.y-self.r, self.x+self.r, self.y+self.r)
-        grad.setColorAt(0, QColor('#42a5f5')); grad.setColorAt(1, QColor('#1976d2'))
-        self.ellipse = scene.addEllipse(self.x-self.r, self.y-self.r, 2*self.r, 2*self.r, QPen(QColor('#0D47A1'), 3), QBrush(grad))
+        self.ellipse = scene.addEllipse(self.x-self.r, self.y-self.r, 2*self.r, 2*self.r, pen('#0D47A1', 3), node_brush())
         self.ellipse.setZValue(2)
         self.label = scene.addText(str(self.v))
-        self.label.setDefaultTextColor(QColor('white'))
-        self.label.setFont(QFont("Arial", 12, QFont.Bold))
+        self.label.setDefaultTextColor(color('white'))
+        self.label.setFont(font(12))
+        self.place_label()
+        self.label.setZValue(3)
+
+    def place_label(self):
         r = self.label.boundingRect()
         self.label.setPos(self.x - r.width()/2, self.y - r.height()/2)
-        self.label.setZValue(3)
 
-    def set_highlight(self, scene, mode='normal'):
+    def move_to(self, x, y):
+        self.x, self.y = x, y
         if not self.ellipse: return
-        brush, color = QBrush(), QColor('white')
-        if mode == 'processing': brush, color = QBrush(QColor('#ffeb3b')), QColor('#d84315')
-        elif mode == 'visited': brush, color = QBrush(QColor('#CFD8DC')), QColor('black')
-        elif mode == 'target': brush, color = QBrush(QColor('#f44336')), QColor('white')
-        elif mode == 'path': brush, color = QBrush(QColor('#43A047')), QColor('white')
-        else: 
-            grad = QLinearGradient(self.x-self.r, self.y-self.r, self.x+self.r, self.y+self.r)
-            grad.setColorAt(0, QColor('#42a5f5')); grad.setColorAt(1, QColor('#1976d2'))
-            brush = QBrush(grad)
-        self.ellipse.setBrush(brush)
-        self.label.setDefaultTextColor(color)
+        self.ellipse.setRect(x-self.r, y-self.r, 2*self.r, 2*self.r)
+        self.place_label()
+
+    def remove_from_scene(self, scene):
+        if self.ellipse: scene.removeItem(self.ellipse); scene.removeItem(self.label)
+        self.ellipse, self.label = None, None
+
+    def set_highlight(self, scene, mode='normal'):
+        if not self.ellipse or mode == self.mode: return
+        self.mode = mode
+        fill, text = NODE_STYLES.get(mode, (None, 'white'))
+        self.ellipse.setBrush(brush(fill) if fill else node_brush())
+        self.label.setDefaultTextColor(color(text))
 
 class EdgeItem:
     def __init__(self, u, v, w, x1, y1, x2, y2, directed=False, curve_offset=0):
         self.u, self.v, self.weight = u, v, w
         self.x1, self.y1, self.x2, self.y2 = x1, y1, x2, y2
         self.directed, self.curve_offset = directed, curve_offset
-        self.path_item, self.text_item, self.arrows = None, None, []
+        self.path_item, self.text_item, self.arrow_item = None, None, None
+        self.arrow = None
+        self.mode = 'normal'
 
-    def add_to_scene(self, scene):
-        path = QPainterPath()
-        path.moveTo(self.x1, self.y1)
+    def update_geometry(self):
         mx, my = (self.x1 + self.x2)/2, (self.y1 + self.y2)/2
         if self.curve_offset != 0:
             dx, dy = self.x2 - self.x1, self.y2 - self.y1
             dist = math.sqrt(dx**2 + dy**2) or 1
             nx, ny = -dy/dist, dx/dist
             cx, cy = mx + nx * self.curve_offset, my + ny * self.curve_offset
-            path.quadTo(cx, cy, self.x2, self.y2)
             self.mid_x, self.mid_y = cx, cy
             self.angle = math.atan2(self.y2 - cy, self.x2 - cx)
         else:
-            path.lineTo(self.x2, self.y2)
             self.mid_x, self.mid_y = mx, my
             self.angle = math.atan2(self.y2 - self.y1, self.x2 - self.x1)
-        self.path_item = scene.addPath(path, QPen(QColor('#90A4AE'), 2))
+        self.arrow = None
+
+    def build_path(self):
+        path = QPainterPath()
+        path.moveTo(self.x1, self.y1)
+        if self.curve_offset != 0: path.quadTo(self.mid_x, self.mid_y, self.x2, self.y2)
+        else: path.lineTo(self.x2, self.y2)
+        return path
+
+    def add_to_scene(self, scene):
+        self.update_geometry()
+        self.path_item = scene.addPath(self.build_path(), edge_pen(self.mode))
         self.path_item.setZValue(0)
         if self.directed: self.draw_arrow(scene)
         self.draw_weight(scene)
 
     def draw_weight(self, scene):
-        off = -10 if self.curve_offset > 0 else 10 if self.curve_offset < 0 else -10
         self.text_item = scene.addText(str(self.weight))
-        self.text_item.setDefaultTextColor(QColor('#455A64'))
-        self.text_item.setFont(QFont("Arial", 10, QFont.Bold))
-        r = self.text_item.boundingRect()
-        self.text_item.setPos(self.mid_x - r.width()/2, self.mid_y - r.height()/2 + off)
+        self.text_item.setDefaultTextColor(color('#455A64'))
+        self.text_item.setFont(font(10))
+        self.place_weight()
         self.text_item.setZValue(1)
 
-    def draw_arrow(self, scene):
-        ex = self.x2 - 24 * math.cos(self.angle)
-        ey = self.y2 - 24 * math.sin(self.angle)
-        for d in [-math.pi/6, math.pi/6]:
-            ax, ay = ex - 12 * math.cos(self.angle + d), ey - 12 * math.sin(self.angle + d)
-            l = scene.addLine(ex, ey, ax, ay, QPen(QColor('#90A4AE'), 2))
-            l.setZValue(1); self.arrows.append(l)
+    def weight_anchor(self):
+        off = -10 if self.curve_offset > 0 else 10 if self.curve_offset < 0 else -10
+        return self.mid_x, self.mid_y + off
 
-    def set_highlight(self, scene, mode='normal'):
-        if not self.path_item: return
-        c, w = (QColor('#ff9800'), 4) if mode == 'highlight' else (QColor('#2962FF'), 5) if mode == 'path' else (QColor('#90A4AE'), 2)
-        self.path_item.setPen(QPen(c, w))
-        if self.text_item: self.text_item.setDefaultTextColor(QColor('#e65100') if mode!='normal' else QColor('#455A64'))
-        for a in self.arrows: scene.removeItem(a)
-        self.arrows = []
-        if self.directed: 
+    def place_weight(self):
+        x, y = self.weight_anchor()
+        r = self.text_item.boundingRect()
+        self.text_item.setPos(x - r.width()/2, y - r.height()/2)
+
+    # Both barbs as one open path, rebuilt only after the endpoints move
+    def arrow_path(self):
+        if self.arrow is None:
             ex = self.x2 - 24 * math.cos(self.angle)
             ey = self.y2 - 24 * math.sin(self.angle)
-            for d in [-math.pi/6, math.pi/6]:
-                ax, ay = ex - 12 * math.cos(self.angle + d), ey - 12 * math.sin(self.angle + d)
-                l = scene.addLine(ex, ey, ax, ay, QPen(c, 2))
-                l.setZValue(1); self.arrows.append(l)
+            path = QPainterPath()
+            path.moveTo(ex - 12 * math.cos(self.angle - math.pi/6), ey - 12 * math.sin(self.angle - math.pi/6))
+            path.lineTo(ex, ey)
+            path.lineTo(ex - 12 * math.cos(self.angle + math.pi/6), ey - 12 * math.sin(self.angle + math.pi/6))
+            self.arrow = path
+        return self.arrow
+
+    def draw_arrow(self, scene):
+        self.arrow_item = scene.addPath(self.arrow_path(), pen(edge_style(self.mode)[0], 2))
+        self.arrow_item.setZValue(1)
+
+    def polyline(self):
+        if self.curve_offset != 0: return quad_points(self.x1, self.y1, self.mid_x, self.mid_y, self.x2, self.y2)
+        return [(self.x1, self.y1), (self.x2, self.y2)]
+
+    # Moves the endpoints in place: only this edge's own items are touched
+    def set_endpoints(self, scene, x1, y1, x2, y2):
+        self.x1, self.y1, self.x2, self.y2 = x1, y1, x2, y2
+        self.update_geometry()
+        if not self.path_item: return
+        self.path_item.setPath(self.build_path())
+        self.place_weight()
+        if self.arrow_item: self.arrow_item.setPath(self.arrow_path())
+
+    def remove_from_scene(self, scene):
+        for item in (self.path_item, self.text_item, self.arrow_item):
+            if item is not None: scene.removeItem(item)
+        self.path_item, self.text_item, self.arrow_item = None, None, None
+
+    def set_highlight(self, scene, mode='normal'):
+        if not self.path_item or mode == self.mode: return
+        self.mode = mode
+        self.path_item.setPen(edge_pen(mode))
+        if self.text_item: self.text_item.setDefaultTextColor(color('#e65100') if mode!='normal' else color('#455A64'))
+        if self.arrow_item: self.arrow_item.setPen(pen(edge_style(mode)[0], 2))
+
+class BatchGraphItem(QGraphicsItem):
+    # Paints the whole graph from one scene item: the overview comes from cached
+    # line / point batches, full detail only for the vertices actually exposed.
+    def __init__(self, window):
+        super().__init__()
+        self.window = window
+        self.node_modes, self.edge_modes = {}, {}
+        self.cache, self.bounds = None, None
+        self.floating = set()
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+
+    def invalidate(self):
+        self.prepareGeometryChange()
+        self.cache, self.bounds = None, None
+        self.floating.clear()
+        self.update()
+
+    # A dragged vertex and its edges are left out of the cached batches and
+    # painted on their own, so further moves of it need no rebuild
+    def float_vertex(self, v):
+        if v not in self.floating:
+            self.floating.add(v)
+            self.cache = None
+        self.prepareGeometryChange()
+        self.bounds = None
+        self.update()
+
+    def boundingRect(self):
+        if self.bounds is None:
+            positions = self.window.vertex_positions.values()
+            if not positions: self.bounds = QRectF()
+            else:
+                xs, ys = [x for x, y in positions], [y for x, y in positions]
+                self.bounds = QRectF(min(xs) - 60, min(ys) - 60, max(xs) - min(xs) + 120, max(ys) - min(ys) + 120)
+        return self.bounds
+
+    def build_cache(self):
+        lines, curves = [], QPainterPath()
+        floating = self.floating
+        for edge in self.window.edge_items.values():
+            if floating and (edge.u in floating or edge.v in floating): continue
+            if edge.curve_offset: curves.moveTo(edge.x1, edge.y1); curves.quadTo(edge.mid_x, edge.mid_y, edge.x2, edge.y2)
+            else: lines.append(QLineF(edge.x1, edge.y1, edge.x2, edge.y2))
+        points = QPolygonF([QPointF(x, y) for v, (x, y) in self.window.vertex_positions.items() if v not in floating])
+        self.cache = lines, curves, points
+
+    def set_node_mode(self, v, mode):
+        if mode == 'normal': self.node_modes.pop(v, None)
+        else: self.node_modes[v] = mode
+        x, y = self.window.vertex_positions[v]
+        self.update(QRectF(x - 30, y - 30, 60, 60))
+
+    def set_edge_mode(self, key, mode):
+        if mode == 'normal': self.edge_modes.pop(key, None)
+        else: self.edge_modes[key] = mode
+        self.update(self.window.edge_items[key].build_path().boundingRect().adjusted(-30, -30, 30, 30))
+
+    def set_modes(self, nodes, edges):
+        self.node_modes, self.edge_modes = dict(nodes), dict(edges)
+        self.update()
+
+    def clear_modes(self):
+        self.node_modes.clear()
+        self.edge_modes.clear()
+        self.update()
+
+    def paint(self, painter, option, widget=None):
+        if self.cache is None: self.build_cache()
+        lines, curves, points = self.cache
+        window = self.window
+        rect = option.exposedRect
+        area = (rect.left(), rect.top(), rect.right(), rect.bottom())
+        visible = window.vertex_index.query_rect(*area, LABEL_BUDGET)
+        detail = len(visible) <= LABEL_BUDGET
+        painter.setBrush(Qt.NoBrush)
+        painter.setPen(edge_pen('normal'))
+        painter.drawLines(lines)
+        painter.drawPath(curves)
+        for v in self.floating:
+            for edge in window.incident_edges.get(v, ()): painter.drawPath(edge.build_path())
+        edges = window.edge_index.query_rect(*area) if detail or self.edge_modes else ()
+        for key in self.edge_modes.keys() & edges:
+            painter.setPen(edge_pen(self.edge_modes[key]))
+            painter.drawPath(window.edge_items[key].build_path())
+        if detail: self.paint_edge_detail(painter, edges)
+        else:
+            points = QPolygonF(points)
+            for v in self.floating: points.append(QPointF(*window.vertex_positions[v]))
+            painter.setPen(pen('#0D47A1', 51, Qt.RoundCap))
+            painter.drawPoints(points)
+            painter.setPen(pen('#1976d2', 45, Qt.RoundCap))
+            painter.drawPoints(points)
+            visible = self.node_modes.keys() & window.vertex_index.query_rect(*area) if self.node_modes else ()
+        painter.setFont(font(12))
+        for v in visible:
+            x, y = window.vertex_positions[v]
+            fill, text = NODE_STYLES.get(self.node_modes.get(v), (None, 'white'))
+            painter.setPen(pen('#0D47A1', 3))
+            painter.setBrush(brush(fill) if fill else node_brush())
+            painter.drawEllipse(QPointF(x, y), 24, 24)
+            if not detail: continue
+            painter.setPen(color(text))
+            painter.drawText(QRectF(x - 24, y - 24, 48, 48), Qt.AlignCenter, str(v))
+
+    def paint_edge_detail(self, painter, edges):
+        window = self.window
+        painter.setFont(font(10))
+        painter.setBrush(Qt.NoBrush)
+        for key in edges:
+            edge = window.edge_items[key]
+            mode = self.edge_modes.get(key, 'normal')
+            if edge.directed:
+                painter.setPen(pen(edge_style(mode)[0], 2))
+                painter.drawPath(edge.arrow_path())
+            x, y = edge.weight_anchor()
+            painter.setPen(color('#e65100') if mode != 'normal' else color('#455A64'))
+            painter.drawText(QRectF(x - 30, y - 12, 60, 24), Qt.AlignCenter, str(edge.weight))
+
+class StepLogModel(QAbstractTableModel):
+    # Rows keep the Step itself (or a (type, text) pair for plain messages);
+    # text and colours are produced only for the rows the view asks about.
+    # Appends are buffered and inserted in one batch every LOG_FLUSH_MS.
+    HEADERS = ('Loại', 'Chi tiết')
+
+    def __init__(self):
+        super().__init__()
+        self.algo = None
+        self.rows, self.pending = [], []
+        self.step_rows = array('q')
+        self.flush_timer = QTimer()
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(LOG_FLUSH_MS)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 2
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal: return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def entry(self, row):
+        entry = self.rows[row]
+        if isinstance(entry, Step): return entry.op, describe_step(self.algo, entry)
+        return entry
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        entry = self.rows[index.row()]
+        step_type = entry.op if isinstance(entry, Step) else entry[0]
+        if role == Qt.DisplayRole: return step_type if index.column() == 0 else self.entry(index.row())[1]
+        if role == Qt.BackgroundRole: return step_colors(step_type)[0]
+        if role == Qt.ForegroundRole: return step_colors(step_type)[1]
+        return None
+
+    def append(self, entry):
+        if isinstance(entry, Step): self.step_rows.append(len(self.rows) + len(self.pending))
+        self.pending.append(entry)
+        if not self.flush_timer.isActive(): self.flush_timer.start()
+
+    def extend_steps(self, steps):
+        first = len(self.rows) + len(self.pending)
+        self.step_rows.extend(range(first, first + len(steps)))
+        self.pending.extend(steps)
+        if not self.flush_timer.isActive(): self.flush_timer.start()
+
+    def flush(self):
+        if not self.pending: return
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(self.pending) - 1)
+        self.rows.extend(self.pending)
+        self.pending = []
+        self.endInsertRows()
+
+    def clear(self, algo=None):
+        self.beginResetModel()
+        self.algo = algo
+        self.rows, self.pending = [], []
+        self.step_rows = array('q')
+        self.flush_timer.stop()
+        self.endResetModel()
 
 class GraphSimulator(QMainWindow):
     def __init__(self):
@@ -138,11 +428,23 @@ class GraphSimulator(QMainWindow):
         self.graph = Graph()
         self.vertex_positions = {}  
         self.vertex_items = {}     
-        self.edge_items = []       
+        self.edge_items = {}       
+        self.incident_edges = {}
+        self.highlighted = set()
+        self.shown_nodes, self.shown_edges = {}, {}
+        self.vertex_index = SpatialGrid()
+        self.edge_index = SpatialGrid()
+        self.batch_mode = False
+        self.batch_item = None
+        self.labels_shown = True
         self.selected_vertices = [] 
         self.mode = 'add_vertex'    
-        self.simulation_steps = []
-        self.current_step_index = 0
+        self.timeline = None
+        self.logged = 0
+        self.sim_info = None
+        self.layout_cache = LayoutCache()
+        self.layout_pool = LayoutPool()
+        self.task = None
         
         self.timer = QTimer()
         self.timer.timeout.connect(self.next_step)
@@ -159,6 +461,8 @@ class GraphSimulator(QMainWindow):
         self.view.mousePressEvent = self.handle_mouse_press
         self.view.mouseMoveEvent = self.handle_mouse_move
         self.view.mouseReleaseEvent = self.handle_mouse_release
+        self.view.wheelEvent = self.handle_wheel
+        self.view.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
         self.dragging_vertex = None
         main_splitter.addWidget(self.view)
 
@@ -182,12 +486,24 @@ class GraphSimulator(QMainWindow):
         self.combo_directed.addItems(['Vô hướng', 'Có hướng'])
         row_edit_2.addWidget(self.btn_remove)
         row_edit_2.addWidget(self.combo_directed)
-        self.btn_import = QPushButton('📂 Nhập từ File (.txt)')
+        self.btn_import = QPushButton('📂 Nhập từ File (.txt/.grph)')
         self.btn_import.setStyleSheet("background-color: #607D8B; color: white;")
         self.btn_import.clicked.connect(self.import_from_file)
+        self.btn_save = QPushButton('💾 Lưu File')
+        self.btn_save.setStyleSheet("background-color: #607D8B; color: white;")
+        self.btn_save.clicked.connect(self.save_to_file)
+        row_edit_4 = QHBoxLayout()
+        row_edit_4.addWidget(self.btn_import)
+        row_edit_4.addWidget(self.btn_save)
+        row_edit_3 = QHBoxLayout()
+        row_edit_3.addWidget(QLabel("Dàn trang:"))
+        self.combo_layout = QComboBox()
+        self.combo_layout.addItems(['Tự động', 'Chính xác O(V²)', 'Barnes–Hut (xấp xỉ)'])
+        row_edit_3.addWidget(self.combo_layout)
         layout_edit.addLayout(row_edit_1)
         layout_edit.addLayout(row_edit_2)
-        layout_edit.addWidget(self.btn_import)
+        layout_edit.addLayout(row_edit_3)
+        layout_edit.addLayout(row_edit_4)
         self.grp_edit.setLayout(layout_edit)
         right_layout.addWidget(self.grp_edit)
 
@@ -220,7 +536,7 @@ class GraphSimulator(QMainWindow):
         right_layout.addWidget(self.grp_sim)
         
         # 3. Controls
-        player_group = QGroupBox("3. Điều khiển chạy")
+        self.grp_player = QGroupBox("3. Điều khiển chạy")
         layout_player = QHBoxLayout()
         layout_player.addWidget(QLabel("Tốc độ:"))
         self.slider_speed = QSlider(Qt.Horizontal)
@@ -235,8 +551,26 @@ class GraphSimulator(QMainWindow):
         self.btn_auto.setEnabled(False)
         layout_player.addWidget(self.btn_auto)
         layout_player.addWidget(self.btn_next)
-        player_group.setLayout(layout_player)
-        right_layout.addWidget(player_group)
+        layout_timeline = QHBoxLayout()
+        self.btn_prev = QPushButton("⏮ Lùi")
+        self.slider_step = QSlider(Qt.Horizontal)
+        self.slider_step.setMaximum(0)
+        self.spin_step = QSpinBox()
+        self.spin_step.setPrefix("Bước ")
+        self.spin_step.setMaximum(0)
+        self.lbl_steps = QLabel("/ 0")
+        self.btn_skip = QPushButton("⏭ Tới lượt thăm")
+        self.btn_skip.setToolTip("Nhảy tới bước thăm đỉnh hoặc tô đường đi kế tiếp")
+        layout_timeline.addWidget(self.btn_prev)
+        layout_timeline.addWidget(self.slider_step, stretch=1)
+        layout_timeline.addWidget(self.spin_step)
+        layout_timeline.addWidget(self.lbl_steps)
+        layout_timeline.addWidget(self.btn_skip)
+        layout_controls = QVBoxLayout()
+        layout_controls.addLayout(layout_player)
+        layout_controls.addLayout(layout_timeline)
+        self.grp_player.setLayout(layout_controls)
+        right_layout.addWidget(self.grp_player)
 
         # 4. Tabs
         self.tabs = QTabWidget()
@@ -273,9 +607,12 @@ class GraphSimulator(QMainWindow):
         # Tab 2: Logs
         tab_log_widget = QWidget()
         l_log = QVBoxLayout(tab_log_widget)
-        self.table = QTableWidget(0, 2)
-        self.table.setHorizontalHeaderLabels(['Loại', 'Chi tiết'])
+        self.step_log = StepLogModel()
+        self.table = QTableView()
+        self.table.setModel(self.step_log)
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.step_log.rowsInserted.connect(self.table.scrollToBottom)
         l_log.addWidget(self.table)
 
         # Tab 3: Compare
@@ -296,6 +633,15 @@ class GraphSimulator(QMainWindow):
         main_splitter.addWidget(right_panel)
         main_splitter.setSizes([1100, 500])
         self.setCentralWidget(main_splitter)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(320)
+        self.btn_cancel = QPushButton("Huỷ")
+        self.btn_cancel.setObjectName("btn_reset")
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        self.statusBar().addPermanentWidget(self.btn_cancel)
+        self.progress_bar.hide()
+        self.btn_cancel.hide()
         
         # Connect Signals
         self.btn_add_vertex.clicked.connect(lambda: self.set_mode('add_vertex'))
@@ -306,116 +652,120 @@ class GraphSimulator(QMainWindow):
         self.btn_next.clicked.connect(self.next_step)
         self.btn_reset.clicked.connect(self.reset_visuals)
         self.btn_auto.clicked.connect(self.toggle_auto_run)
+        self.btn_cancel.clicked.connect(lambda: self.task and self.task.cancel())
+        self.btn_prev.clicked.connect(lambda: self.seek_to(self.timeline.position - 1))
+        self.btn_skip.clicked.connect(self.skip_to_visit)
+        self.slider_step.valueChanged.connect(self.seek_to)
+        self.spin_step.editingFinished.connect(lambda: self.seek_to(self.spin_step.value()))
+        self.update_timeline_controls()
         
         self.update_code_view()
 
-    # --- Force Layout ---
-    def apply_force_layout(self, nodes, edges, iterations=50):
-        width, height = 1100, 700
-        center_x, center_y = 550, 350
-        positions = {}
-        for node in nodes:
-            positions[node] = [center_x + random.uniform(-100, 100), center_y + random.uniform(-100, 100)]
-        k = math.sqrt((width * height) / len(nodes)) * 1.2
-        t = width / 10
-        
-        for i in range(iterations):
-            disp = {node: [0, 0] for node in nodes}
-            for v in nodes:
-                for u in nodes:
-                    if u != v:
-                        dx = positions[v][0] - positions[u][0]
-                        dy = positions[v][1] - positions[u][1]
-                        dist = math.sqrt(dx*dx + dy*dy)
-                        if dist < 0.01: dist = 0.01
-                        force = (k * k) / dist
-                        disp[v][0] += (dx / dist) * force
-                        disp[v][1] += (dy / dist) * force
-            for u, v, w in edges:
-                if u not in positions or v not in positions: continue
-                dx = positions[v][0] - positions[u][0]
-                dy = positions[v][1] - positions[u][1]
-                dist = math.sqrt(dx*dx + dy*dy)
-                if dist < 0.01: dist = 0.01
-                force = (dist * dist) / k
-                dx_norm = (dx / dist) * force
-                dy_norm = (dy / dist) * force
-                disp[v][0] -= dx_norm
-                disp[v][1] -= dy_norm
-                disp[u][0] += dx_norm
-                disp[u][1] += dy_norm
-            for v in nodes:
-                dx = disp[v][0]
-                dy = disp[v][1]
-                dist = math.sqrt(dx*dx + dy*dy)
-                if dist > 0:
-                    limited_dist = min(dist, t)
-                    positions[v][0] += (dx / dist) * limited_dist
-                    positions[v][1] += (dy / dist) * limited_dist
-                    positions[v][0] = min(width - 50, max(50, positions[v][0]))
-                    positions[v][1] = min(height - 50, max(50, positions[v][1]))
-            t *= 0.95
-        return positions
+    # --- Background tasks: one at a time; the panels that could touch the
+    # graph or the trace stay disabled until the result is back ---
+    def run_task(self, label, done, fn, *args, failed=None):
+        if self.task: return
+        self.timer.stop()
+        task = Task(fn, *args)
+        task.signals.progress.connect(self.show_progress)
+        task.signals.finished.connect(lambda result: self.end_task(done, result))
+        task.signals.failed.connect(lambda error: self.end_task(QMessageBox.critical, self, "Lỗi", f"{failed or label}: {error}"))
+        task.signals.cancelled.connect(lambda: self.end_task(self.statusBar().showMessage, f"Đã huỷ: {label}", 3000))
+        self.task = task
+        for widget in (self.grp_edit, self.grp_sim, self.grp_player): widget.setEnabled(False)
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.show()
+        self.btn_cancel.show()
+        self.statusBar().showMessage(label)
+        QThreadPool.globalInstance().start(task)
+
+    def show_progress(self, percent, text):
+        if percent >= 0: self.progress_bar.setRange(0, 100); self.progress_bar.setValue(percent)
+        else: self.progress_bar.setRange(0, 0)
+        self.statusBar().showMessage(text)
+
+    def end_task(self, then, *args):
+        self.task = None
+        for widget in (self.grp_edit, self.grp_sim, self.grp_player): widget.setEnabled(True)
+        self.progress_bar.hide()
+        self.btn_cancel.hide()
+        self.statusBar().clearMessage()
+        if self.timeline:
+            self.log_pulled()
+            self.update_timeline_controls()
+        then(*args)
+
+    def closeEvent(self, event):
+        if self.task: self.task.cancel()
+        self.layout_pool.shutdown()
+        QThreadPool.globalInstance().waitForDone(2000)
+        super().closeEvent(event)
+
+    # --- Force Layout (worker thread; the layout itself runs in LayoutPool's process) ---
+    def apply_force_layout(self, task, nodes, edges, iterations=50, method='auto'):
+        key = layout_key(nodes, edges, iterations, method)
+        positions = self.layout_cache.get(key, nodes)
+        if positions is not None:
+            return positions, [("cache_hit", f"Cache layout trúng ({key[:10]}): bỏ qua dàn trang. Trúng {self.layout_cache.hits} / trượt {self.layout_cache.misses}")]
+        positions = self.layout_pool.run(task, nodes, edges, iterations, seed_from_key(key), method)
+        try: self.layout_cache.put(key, nodes, positions)
+        except OSError: pass
+        return positions, [("cache_miss", f"Cache layout trượt ({key[:10]}): đã dàn trang và lưu. Trúng {self.layout_cache.hits} / trượt {self.layout_cache.misses}")]
 
     # --- Import ---
     def import_from_file(self):
         options = QFileDialog.Options()
-        file_name, _ = QFileDialog.getOpenFileName(self, "Chọn file đồ thị", "", "Text Files (*.txt);;All Files (*)", options=options)
+        file_name, _ = QFileDialog.getOpenFileName(self, "Chọn file đồ thị", "", "Text Files (*.txt);;Graph Snapshot (*.grph);;All Files (*)", options=options)
+        if not file_name: return
+        directed = self.combo_directed.currentIndex() == 1
+        method = LAYOUT_METHODS[self.combo_layout.currentIndex()]
+        self.run_task("Đang nhập đồ thị...", self.finish_import, self.load_graph_file, file_name, directed, method, failed="Lỗi đọc file")
+
+    # Runs on the worker thread: nothing here may touch widgets or the scene
+    def load_graph_file(self, task, file_name, directed, method):
+        positions = None
+        if file_name.endswith('.grph'): graph, positions = open_snapshot(file_name)
+        else: graph = load_graph(file_name, directed=directed)
+        sorted_nodes = list(graph.adj)
+        if positions is not None: return graph, positions, [("visit", f"Đã mở snapshot {len(sorted_nodes)} đỉnh (dùng lại layout đã lưu).")]
+        if not sorted_nodes: return graph, {}, []
+        task.check()
+        edges_list = list(graph.edges())
+        method = resolve_method(method, len(sorted_nodes))
+        t0 = time.perf_counter()
+        positions, messages = self.apply_force_layout(task, sorted_nodes, edges_list, iterations=100, method=method)
+        layout_time = time.perf_counter() - t0
+        task.report(-1, "Đang đánh giá bố cục...")
+        quality = layout_quality(positions, edges_list)
+        messages.append(("visit", f"Đã nhập {len(sorted_nodes)} đỉnh (Layout Tự động)."))
+        messages.append(("update_dist", f"Dàn trang '{method}': {layout_time:.2f}s, CV độ dài cạnh {quality['edge_cv']:.2f}, giao cắt {quality['crossing_rate']:.1%}"))
+        return graph, positions, messages
+
+    def finish_import(self, result):
+        graph, positions, messages = result
+        if not graph.adj: return
+        self.combo_directed.blockSignals(True)
+        self.combo_directed.setCurrentIndex(1 if graph.directed else 0)
+        self.combo_directed.blockSignals(False)
+        self.reset_visuals()
+        close_snapshot(self.graph, keep=False)
+        self.graph = graph
+        self.vertex_positions = dict(positions)
+        self.redraw()
+        self.update_node_lists()
+        for step_type, text in messages: self.log_step(step_type, text)
+        QMessageBox.information(self, "Thành công", "Đã nhập và tự động dàn trang đồ thị!")
+
+    def save_to_file(self):
+        file_name, selected = QFileDialog.getSaveFileName(self, "Lưu đồ thị", "", "Graph Snapshot (*.grph);;Edge List (*.txt);;Adjacency Matrix (*.txt)")
         if not file_name: return
         try:
-            with open(file_name, 'r') as f:
-                lines = [line.strip() for line in f if line.strip()]
-            if not lines: raise ValueError("File rỗng!")
-
-            self.graph = Graph()
-            self.vertex_positions = {}
-            self.vertex_items = {}
-            self.edge_items = []
-            self.scene.clear()
-            self.graph.directed = (self.combo_directed.currentIndex() == 1)
-            
-            first_line_nums = list(map(int, lines[0].split()))
-            is_matrix = False
-            if len(lines) > 1 and len(lines) == len(first_line_nums): is_matrix = True
-            nodes_set = set()
-            edges_list = [] 
-
-            if is_matrix:
-                size = len(lines)
-                for r in range(size):
-                    row_vals = list(map(int, lines[r].split()))
-                    nodes_set.add(r + 1)
-                    for c in range(size):
-                        weight = row_vals[c]
-                        if weight > 0: edges_list.append((r + 1, c + 1, weight))
-            else:
-                start_idx = 0
-                if len(first_line_nums) <= 2 and len(lines) > 1: start_idx = 1
-                for i in range(start_idx, len(lines)):
-                    parts = list(map(int, lines[i].split()))
-                    if len(parts) >= 2:
-                        u, v = parts[0], parts[1]
-                        w = parts[2] if len(parts) > 2 else 1
-                        nodes_set.add(u)
-                        nodes_set.add(v)
-                        edges_list.append((u, v, w))
-
-            sorted_nodes = sorted(list(nodes_set))
-            if not sorted_nodes: return
-            new_positions = self.apply_force_layout(sorted_nodes, edges_list, iterations=100)
-            
-            for node, (x, y) in new_positions.items():
-                self.graph.add_vertex(node)
-                self.vertex_positions[node] = (x, y)
-            for u, v, w in edges_list:
-                self.graph.add_edge(u, v, w)
-
-            self.redraw()
-            self.update_node_lists()
-            self.log_step("visit", f"Đã nhập {len(sorted_nodes)} đỉnh (Layout Tự động).")
-            QMessageBox.information(self, "Thành công", "Đã nhập và tự động dàn trang đồ thị!")
+            if selected.startswith('Adjacency'): save_matrix(file_name, self.graph)
+            elif selected.startswith('Edge') or file_name.endswith('.txt'): save_edge_list(file_name, self.graph)
+            else: save_snapshot(file_name, self.graph, self.vertex_positions)
+            self.log_step("visit", f"Đã lưu đồ thị vào {file_name}")
         except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Lỗi đọc file: {str(e)}")
+            QMessageBox.critical(self, "Lỗi", f"Lỗi ghi file: {str(e)}")
 
     def update_code_view(self):
         algo = self.combo_algorithm.currentText()
@@ -442,6 +792,7 @@ class GraphSimulator(QMainWindow):
         if idx >= 0: self.combo_end.setCurrentIndex(idx)
 
     def handle_mouse_press(self, event):
+        if self.task: return
         pos = self.view.mapToScene(event.pos())
         x, y = pos.x(), pos.y()
         v = self.get_vertex_at(x, y)
@@ -450,6 +801,8 @@ class GraphSimulator(QMainWindow):
             else:
                 v_new = len(self.vertex_positions) + 1
                 while v_new in self.vertex_positions: v_new += 1
+                # A paused trace iterates the live neighbour lists, so every edit ends it first
+                self.reset_visuals()
                 self.graph.add_vertex(v_new)
                 self.vertex_positions[v_new] = (x, y)
                 self.draw_vertex(v_new, x, y)
@@ -464,7 +817,7 @@ class GraphSimulator(QMainWindow):
                         weight, ok = QInputDialog.getInt(self, "Trọng số cạnh", f"Nhập trọng số ({u}, {v2}):", value=1, min=1, max=100)
                         if ok:
                             self.graph.add_edge(u, v2, weight)
-                            self.redraw()
+                            self.refresh_edges(u, v2)
                     self.selected_vertices = []
                     self.reset_visuals()
             else:
@@ -472,19 +825,20 @@ class GraphSimulator(QMainWindow):
                 self.reset_visuals()
         elif self.mode == 'remove':
             if v:
+                self.reset_visuals()
                 self.remove_vertex(v)
                 self.update_node_lists()
             else:
                 u, v2 = self.get_edge_at(x, y)
                 if u is not None:
+                    self.reset_visuals()
                     self.graph.remove_edge(u, v2)
-                    self.redraw()
+                    self.refresh_edges(u, v2)
 
     def handle_mouse_move(self, event):
         if self.dragging_vertex is not None:
             pos = self.view.mapToScene(event.pos())
-            self.vertex_positions[self.dragging_vertex] = (pos.x(), pos.y())
-            self.redraw()
+            self.move_vertex(self.dragging_vertex, pos.x(), pos.y())
 
     def handle_mouse_release(self, event):
         self.dragging_vertex = None
@@ -496,49 +850,125 @@ class GraphSimulator(QMainWindow):
         self.setWindowTitle(f'Mô phỏng - Chế độ: {mode}')
 
     def change_directed(self):
+        self.reset_visuals()
         self.graph.directed = (self.combo_directed.currentIndex() == 1)
-        self.graph.adj = {} 
+        self.graph.clear()
         self.vertex_positions = {}
         self.redraw()
         self.update_node_lists()
 
+    # --- Hit-testing through the uniform grids: only one cell's items are checked ---
     def get_vertex_at(self, x, y):
-        for v, (vx, vy) in self.vertex_positions.items():
-            if (x - vx)**2 + (y - vy)**2 <= 24*24: return v
-        return None
+        best, best_d = None, 24*24
+        for v in self.vertex_index.query(x, y):
+            vx, vy = self.vertex_positions[v]
+            d = (x - vx)**2 + (y - vy)**2
+            if d <= best_d: best, best_d = v, d
+        return best
 
-    def get_edge_at(self, x, y):
-        return None, None 
+    def get_edge_at(self, x, y, tolerance=EDGE_PICK_TOLERANCE):
+        best, best_d = None, tolerance
+        for key in self.edge_index.query(x, y):
+            edge = self.edge_items[key]
+            d = polyline_distance(x, y, edge.polyline())
+            if d <= best_d: best, best_d = edge, d
+        return (best.u, best.v) if best else (None, None)
+
+    def index_vertex(self, v):
+        x, y = self.vertex_positions[v]
+        self.vertex_index.move(v, [(x - 24, y - 24, x + 24, y + 24)])
+
+    def index_edge(self, edge):
+        self.edge_index.move(self.edge_key(edge.u, edge.v), polyline_boxes(edge.polyline(), EDGE_PICK_TOLERANCE))
 
     def draw_vertex(self, v, x, y):
         node = NodeItem(v, x, y)
-        node.add_to_scene(self.scene)
+        if not self.batch_mode:
+            node.add_to_scene(self.scene)
+            node.label.setVisible(self.labels_shown)
         self.vertex_items[v] = node
+        self.index_vertex(v)
+        self.invalidate_batch()
 
     def draw_edge(self, u, v, w, curve_offset=0):
         if u not in self.vertex_positions or v not in self.vertex_positions: return
         x1, y1 = self.vertex_positions[u]
         x2, y2 = self.vertex_positions[v]
         edge = EdgeItem(u, v, w, x1, y1, x2, y2, self.graph.directed, curve_offset)
-        edge.add_to_scene(self.scene)
-        self.edge_items.append(edge)
+        if self.batch_mode: edge.update_geometry()
+        else:
+            edge.add_to_scene(self.scene)
+            edge.text_item.setVisible(self.labels_shown)
+        self.edge_items[self.edge_key(u, v)] = edge
+        self.index_edge(edge)
+        self.incident_edges.setdefault(u, []).append(edge)
+        if v != u: self.incident_edges.setdefault(v, []).append(edge)
+        self.invalidate_batch()
+
+    def invalidate_batch(self):
+        if self.batch_item: self.batch_item.invalidate()
+
+    # Directed edges are keyed by (u, v); undirected ones by the ordered pair
+    def edge_key(self, u, v):
+        return (u, v) if self.graph.directed or u <= v else (v, u)
+
+    def discard_edge_item(self, edge):
+        edge.remove_from_scene(self.scene)
+        self.edge_items.pop(self.edge_key(edge.u, edge.v), None)
+        self.edge_index.remove(self.edge_key(edge.u, edge.v))
+        self.highlighted.discard(edge)
+        for x in (edge.u, edge.v):
+            items = self.incident_edges.get(x)
+            if items and edge in items: items.remove(edge)
+        self.invalidate_batch()
+
+    # --- Incremental scene updates: O(degree) instead of a full redraw ---
+    def move_vertex(self, v, x, y):
+        self.vertex_positions[v] = (x, y)
+        if v in self.vertex_items: self.vertex_items[v].move_to(x, y)
+        self.index_vertex(v)
+        for edge in self.incident_edges.get(v, ()):
+            x1, y1 = self.vertex_positions[edge.u]
+            x2, y2 = self.vertex_positions[edge.v]
+            edge.set_endpoints(self.scene, x1, y1, x2, y2)
+            self.index_edge(edge)
+        if self.batch_item: self.batch_item.float_vertex(v)
+
+    def refresh_edges(self, u, v):
+        for key in {self.edge_key(u, v), self.edge_key(v, u)}:
+            if key in self.edge_items: self.discard_edge_item(self.edge_items[key])
+        for a, b in ((u, v),) if u == v or not self.graph.directed else ((u, v), (v, u)):
+            w = self.graph.weight(a, b)
+            if w is not None: self.draw_edge(a, b, w, 40 if self.graph.directed and self.graph.has_edge(b, a) else 0)
 
     def remove_vertex(self, v):
         if v in self.vertex_positions:
             del self.vertex_positions[v]
-            if v in self.graph.adj: del self.graph.adj[v]
-            for u in self.graph.adj:
-                self.graph.adj[u] = [x for x in self.graph.adj[u] if x[0] != v]
-            self.redraw()
+            self.vertex_index.remove(v)
+            self.graph.remove_vertex(v)
+            for edge in list(self.incident_edges.pop(v, ())): self.discard_edge_item(edge)
+            node = self.vertex_items.pop(v, None)
+            if node:
+                node.remove_from_scene(self.scene)
+                self.highlighted.discard(node)
+            self.invalidate_batch()
 
     def redraw(self):
+        self.batch_item = None
         self.scene.clear()
         self.vertex_items.clear()
         self.edge_items.clear()
+        self.incident_edges.clear()
+        self.highlighted.clear()
+        self.shown_nodes.clear()
+        self.shown_edges.clear()
+        self.vertex_index.clear()
+        self.edge_index.clear()
         existing_edges = set()
         for u in self.graph.adj:
             for v, w in self.graph.adj[u]: existing_edges.add((u, v))
         drawn_edges = set()
+        self.batch_mode = len(self.vertex_positions) + len(existing_edges) // (1 if self.graph.directed else 2) > BATCH_THRESHOLD
         
         for u in self.graph.adj:
             for v, w in self.graph.adj[u]:
@@ -555,28 +985,64 @@ class GraphSimulator(QMainWindow):
                         drawn_edges.add(edge_key)
                 if should_draw: self.draw_edge(u, v, w, curve_offset)
         for v, (x, y) in self.vertex_positions.items(): self.draw_vertex(v, x, y)
+        if self.batch_mode:
+            self.batch_item = BatchGraphItem(self)
+            self.scene.addItem(self.batch_item)
+
+    # --- Level of detail: wheel zoom; item-mode text hides when zoomed out ---
+    def handle_wheel(self, event):
+        factor = 1.15 ** (event.angleDelta().y() / 120)
+        self.view.scale(factor, factor)
+        self.apply_detail_level()
+
+    def apply_detail_level(self):
+        shown = self.view.transform().m11() >= LABEL_SCALE
+        if shown == self.labels_shown: return
+        self.labels_shown = shown
+        for node in self.vertex_items.values():
+            if node.label: node.label.setVisible(shown)
+        for edge in self.edge_items.values():
+            if edge.text_item: edge.text_item.setVisible(shown)
 
     def highlight_node(self, v, mode='normal'):
-        if v in self.vertex_items: self.vertex_items[v].set_highlight(self.scene, mode)
+        if mode == 'normal': self.shown_nodes.pop(v, None)
+        else: self.shown_nodes[v] = mode
+        if self.batch_item:
+            if v in self.vertex_positions: self.batch_item.set_node_mode(v, mode)
+            return
+        if v in self.vertex_items:
+            self.vertex_items[v].set_highlight(self.scene, mode)
+            self.highlighted.add(self.vertex_items[v])
 
     def highlight_edge(self, u, v, mode='normal'):
-        for edge in self.edge_items:
-            if self.graph.directed:
-                if edge.u == u and edge.v == v: edge.set_highlight(self.scene, mode)
-            else:
-                if (edge.u == u and edge.v == v) or (edge.u == v and edge.v == u):
-                    edge.set_highlight(self.scene, mode)
+        key = self.edge_key(u, v)
+        if key not in self.edge_items: return
+        if mode == 'normal': self.shown_edges.pop(key, None)
+        else: self.shown_edges[key] = mode
+        if self.batch_item: self.batch_item.set_edge_mode(key, mode); return
+        edge = self.edge_items[key]
+        edge.set_highlight(self.scene, mode)
+        self.highlighted.add(edge)
+
+    def clear_highlights(self):
+        if self.batch_item: self.batch_item.clear_modes()
+        for item in self.highlighted: item.set_highlight(self.scene, 'normal')
+        self.highlighted.clear()
+        self.shown_nodes.clear()
+        self.shown_edges.clear()
 
     def reset_visuals(self):
         self.timer.stop()
+        if self.timeline: self.timeline.stream.close()
+        self.timeline = None
+        self.logged = 0
         self.btn_auto.setText("▶ Tự động")
-        self.redraw()
-        self.btn_next.setEnabled(False)
-        self.btn_auto.setEnabled(False)
-        self.table.setRowCount(0)
+        self.clear_highlights()
+        self.step_log.clear()
         self.txt_path.clear()
         self.txt_struct.clear()
         self.highlight_code_line(-1)
+        self.update_timeline_controls()
 
     # --- SIMULATION SAFETY ---
     def start_simulation(self):
@@ -595,16 +1061,14 @@ class GraphSimulator(QMainWindow):
             self.reset_visuals()
             if end_node is not None: self.highlight_node(end_node, 'target')
             
-            path_cost = 0
-            if algo == 'DFS': self.simulation_steps, path_cost = self.graph.dfs(start, end_node)
-            elif algo == 'BFS': self.simulation_steps, path_cost = self.graph.bfs(start, end_node)
-            elif algo == 'Dijkstra': self.simulation_steps, path_cost = self.graph.dijkstra(start, end_node)
+            if algo == 'DFS': step_iter = self.graph.iter_dfs(start, end_node)
+            elif algo == 'BFS': step_iter = self.graph.iter_bfs(start, end_node)
+            elif algo == 'Dijkstra': step_iter = self.graph.iter_dijkstra(start, end_node)
             
-            self.update_compare_table(algo, start, end_node, len(self.simulation_steps), path_cost)
-
-            self.current_step_index = 0
-            self.btn_next.setEnabled(True)
-            self.btn_auto.setEnabled(True)
+            self.timeline = TraceTimeline(StepStream(step_iter), algo, self.edge_key, self.shown_nodes)
+            self.step_log.algo = algo
+            self.sim_info = (algo, start, end_node)
+            self.update_timeline_controls()
             self.update_code_view()
             self.highlight_code_line(0)
             self.log_step("visit", f"Bắt đầu {algo} tại {start}")
@@ -640,67 +1104,111 @@ class GraphSimulator(QMainWindow):
             self.btn_auto.setText("⏸ Tạm dừng")
 
     def log_step(self, step_type, description):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        item_type = QTableWidgetItem(step_type)
-        item_desc = QTableWidgetItem(description)
-        bg_color, text_color = QColor('white'), QColor('black')
-        if step_type == 'processing': bg_color, text_color = QColor('#FFF9C4'), QColor('#F57F17')
-        elif step_type == 'visit': bg_color, text_color = QColor('#C8E6C9'), QColor('#2E7D32')
-        elif step_type == 'traverse': bg_color, text_color = QColor('#E1F5FE'), QColor('#0277BD')
-        elif step_type == 'check_edge': bg_color, text_color = QColor('#F5F5F5'), QColor('#616161')
-        elif step_type == 'update_dist': bg_color, text_color = QColor('#FFE0B2'), QColor('#E65100')
-        elif step_type == 'backtrack': bg_color, text_color = QColor('#F8BBD0'), QColor('#C2185B')
-        elif 'highlight_path' in step_type: bg_color, text_color = QColor('#B9F6CA'), QColor('#1B5E20')
-        elif step_type == 'check_loop': bg_color, text_color = QColor('#ECEFF1'), QColor('#546E7A')
-        elif step_type == 'not_found': bg_color, text_color = QColor('#FFCDD2'), QColor('#B71C1C')
-        
-        item_type.setBackground(bg_color); item_type.setForeground(text_color)
-        item_desc.setBackground(bg_color); item_desc.setForeground(text_color)
-        self.table.setItem(row, 0, item_type); self.table.setItem(row, 1, item_desc)
-        self.table.scrollToBottom()
+        self.step_log.append((step_type, description))
+
+    def finish_simulation(self):
+        if not self.timeline or not self.sim_info: return
+        while self.timeline.pull() is not None: pass
+        algo, start, end_node = self.sim_info
+        stream = self.timeline.stream
+        self.update_compare_table(algo, start, end_node, stream.count, stream.result or 0)
+        self.sim_info = None
+        self.log_pulled()
+
+    def apply_step(self, step):
+        for kind, key, mode in step_highlights(step):
+            if kind == 'node': self.highlight_node(key, mode)
+            else: self.highlight_edge(*key, mode)
+
+    def show_step(self, step):
+        desc, path_text, struct_text = self.timeline.replay.texts(step)
+        self.txt_path.setText(path_text)
+        self.txt_struct.setText(struct_text)
+        self.highlight_code_line(step.line)
+        return desc
+
+    def log_pulled(self):
+        steps = self.timeline.steps
+        if len(steps) > self.logged: self.step_log.extend_steps(steps[self.logged:])
+        self.logged = len(steps)
+
+    # --- Timeline: seeking restores the nearest checkpoint, then only the
+    # highlights that differ from what is on screen are redrawn ---
+    def update_timeline_controls(self):
+        timeline = self.timeline
+        position, total = (timeline.position, len(timeline.steps)) if timeline else (0, 0)
+        exhausted = timeline is None or timeline.exhausted
+        more = timeline is not None and not (position == total and exhausted)
+        for widget, maximum in ((self.slider_step, total), (self.spin_step, total if exhausted else 2**31 - 1)):
+            widget.blockSignals(True)
+            widget.setMaximum(maximum)
+            widget.setValue(position)
+            widget.blockSignals(False)
+            widget.setEnabled(timeline is not None)
+        self.lbl_steps.setText(f"/ {total}" if exhausted else f"/ {total}+")
+        self.btn_prev.setEnabled(position > 0)
+        for button in (self.btn_next, self.btn_auto, self.btn_skip): button.setEnabled(more)
+
+    def seek_to(self, n):
+        timeline = self.timeline
+        if not timeline: return
+        if n - len(timeline.steps) > BACKGROUND_STEPS and not timeline.exhausted:
+            self.run_task("Đang sinh vết thuật toán...", lambda count: self.seek_to(n), self.load_trace, n)
+            return
+        step = timeline.seek(n)
+        self.log_pulled()
+        nodes, edges = timeline.nodes, timeline.edges
+        changed_nodes = [v for v in self.shown_nodes.keys() | nodes.keys() if self.shown_nodes.get(v) != nodes.get(v)]
+        changed_edges = [key for key in self.shown_edges.keys() | edges.keys() if self.shown_edges.get(key) != edges.get(key)]
+        if self.batch_item and len(changed_nodes) + len(changed_edges) > SEEK_REPAINT_ALL:
+            # One repaint of the batch item instead of one per changed mode
+            self.batch_item.set_modes(nodes, edges)
+            self.shown_nodes, self.shown_edges = dict(nodes), dict(edges)
+        else:
+            for v in changed_nodes: self.highlight_node(v, nodes.get(v, 'normal'))
+            for key in changed_edges: self.highlight_edge(*key, edges.get(key, 'normal'))
+        if step:
+            self.show_step(step)
+            self.step_log.flush()
+            self.table.selectRow(self.step_log.step_rows[timeline.position - 1])
+        else:
+            self.txt_path.clear()
+            self.txt_struct.clear()
+            self.highlight_code_line(0)
+        if timeline.at_end: self.finish_simulation()
+        elif not self.timer.isActive(): self.btn_auto.setText("▶ Tiếp tục")
+        self.update_timeline_controls()
+
+    def load_trace(self, task, n):
+        return self.timeline.load(n, lambda count: task.check() or task.report(-1, f"Đã sinh {count} bước..."))
+
+    def find_visit(self, task):
+        found = self.timeline.find(lambda step: step.op == 'visit' or step.op.startswith('highlight_path'),
+                                   lambda count: task.check() or task.report(-1, f"Đang tìm lượt thăm kế: đã sinh {count} bước..."))
+        return found if found is not None else len(self.timeline.steps)
+
+    def skip_to_visit(self):
+        if not self.timeline: return
+        if self.timeline.exhausted: self.seek_to(self.find_visit(None))
+        else: self.run_task("Đang tìm lượt thăm kế...", self.seek_to, self.find_visit)
 
     def next_step(self):
-        if self.current_step_index >= len(self.simulation_steps):
+        if not self.timeline: return
+        step = self.timeline.step()
+        if step is None:
             self.timer.stop()
-            self.btn_auto.setText("Hoàn tất")
-            self.btn_auto.setEnabled(False)
-            self.btn_next.setEnabled(False)
-            
-            last_step = self.simulation_steps[-1] if self.simulation_steps else None
-            if last_step and last_step[0] != 'not_found':
-                QMessageBox.information(self, "Hoàn tất", "Đã kết thúc mô phỏng!")
             return
+        self.log_pulled()
+        desc = self.show_step(step)
+        self.apply_step(step)
+        self.update_timeline_controls()
+        if not self.timeline.at_end or not self.sim_info: return
 
-        step_data = self.simulation_steps[self.current_step_index]
-        step_type = step_data[0]
-        u, v, desc = step_data[1], step_data[2], step_data[3]
-        if len(step_data) >= 7:
-            self.txt_path.setText(step_data[4])
-            self.txt_struct.setText(step_data[5])
-            self.highlight_code_line(step_data[6])
-        self.log_step(step_type, desc)
-
-        if step_type == 'processing': self.highlight_node(u, 'processing')
-        elif step_type == 'visit': self.highlight_node(u, 'visited')
-        elif step_type == 'traverse': 
-            self.highlight_edge(u, v, 'highlight')
-            self.highlight_node(v, 'processing')
-        elif step_type == 'backtrack': self.highlight_edge(u, v, 'highlight')
-        elif step_type == 'check_edge': self.highlight_edge(u, v, 'highlight')
-        elif step_type == 'highlight_path_node': self.highlight_node(u, 'path')
-        elif step_type == 'highlight_path_edge': self.highlight_edge(u, v, 'path')
-        elif step_type == 'update_dist': pass 
-        
-        elif step_type == 'not_found':
-            self.timer.stop()
-            QMessageBox.warning(self, "Kết quả", f"Rất tiếc! {desc}")
-            self.btn_auto.setText("Kết thúc")
-            self.btn_auto.setEnabled(False)
-            self.btn_next.setEnabled(False)
-            return 
-        
-        self.current_step_index += 1
+        self.timer.stop()
+        self.btn_auto.setText("Kết thúc" if step.op == 'not_found' else "Hoàn tất")
+        self.finish_simulation()
+        if step.op == 'not_found': QMessageBox.warning(self, "Kết quả", f"Rất tiếc! {desc}")
+        else: QMessageBox.information(self, "Hoàn tất", "Đã kết thúc mô phỏng!")
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
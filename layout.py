@@ -0,0 +1,313 @@
+import hashlib
+import math
+import os
+import random
+from array import array
+from collections import defaultdict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+WIDTH, HEIGHT = 1100, 700
+MARGIN = 50
+BARNES_HUT_THRESHOLD = 2000
+# Barnes-Hut: opening criterion, vertices per leaf before it is summarised,
+# quadtree depth cap and the frontier entries budgeted per vertex of a block
+THETA = 0.8
+LEAF_SIZE = 16
+MAX_DEPTH = 10
+FRONTIER_PER_VERTEX = 256
+LAYOUT_METHODS = ('auto', 'exact', 'barnes_hut')
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'graph_simulator', 'layouts')
+
+def initial_positions(nodes, width=WIDTH, height=HEIGHT, seed=None, spread=100):
+    rng = random.Random(seed) if seed is not None else random
+    if spread is None:
+        return {node: [rng.uniform(MARGIN, width - MARGIN), rng.uniform(MARGIN, height - MARGIN)] for node in nodes}
+    center_x, center_y = width / 2, height / 2
+    return {node: [center_x + rng.uniform(-spread, spread), center_y + rng.uniform(-spread, spread)] for node in nodes}
+
+# --- Barnes-Hut over a quadtree of 2^l x 2^l grids (l = 1..depth): a cell
+# whose side is under THETA times its distance acts as one mass at its centre,
+# leaves that are opened add their vertices one by one, so each vertex feels
+# every other at O(log V) cost ---
+def _tree_depth(n):
+    return min(MAX_DEPTH, max(1, math.ceil(math.log(max(n, 1), 4))))
+
+def _quadtree_python(positions, nodes, depth):
+    xs, ys = [positions[v][0] for v in nodes], [positions[v][1] for v in nodes]
+    lo_x, lo_y = min(xs), min(ys)
+    size = max(max(xs) - lo_x, max(ys) - lo_y, 1e-9)
+    side = 1 << depth
+    leaf_of = {v: (min(int((positions[v][0] - lo_x) * side / size), side - 1), min(int((positions[v][1] - lo_y) * side / size), side - 1)) for v in nodes}
+    levels = [defaultdict(lambda: [0, 0.0, 0.0]) for _ in range(depth + 1)]
+    leaves = defaultdict(list)
+    for v, (cx, cy) in leaf_of.items():
+        leaves[cx, cy].append(v)
+        for l in range(1, depth + 1):
+            cell = levels[l][cx >> (depth - l), cy >> (depth - l)]
+            cell[0] += 1
+            cell[1] += positions[v][0]
+            cell[2] += positions[v][1]
+    return leaf_of, levels, leaves, size
+
+def _repulsion_python(v, positions, k2, depth, tree):
+    leaf_of, levels, leaves, size = tree
+    px, py = positions[v]
+    cx, cy = leaf_of[v]
+    fx = fy = 0.0
+
+    def push(dx, dy, mass):
+        dist2 = max(dx * dx + dy * dy, 1e-4)
+        return dx * k2 * mass / dist2, dy * k2 * mass / dist2
+
+    stack = [(1, x, y) for x in (0, 1) for y in (0, 1)]
+    while stack:
+        l, x, y = stack.pop()
+        cell = levels[l].get((x, y))
+        if not cell: continue
+        mass, sx, sy = cell
+        own = (cx >> (depth - l), cy >> (depth - l)) == (x, y)
+        if own: mass, sx, sy = mass - 1, sx - px, sy - py
+        if not mass: continue
+        dx, dy = px - sx / mass, py - sy / mass
+        s = size / (1 << l)
+        if not own and (dx * dx + dy * dy) * THETA * THETA > s * s or l == depth and mass > LEAF_SIZE:
+            ax, ay = push(dx, dy, mass)
+            fx += ax
+            fy += ay
+        elif l < depth:
+            stack.extend((l + 1, 2 * x + ox, 2 * y + oy) for ox in (0, 1) for oy in (0, 1))
+        else:
+            for u in leaves[x, y]:
+                if u != v:
+                    ax, ay = push(px - positions[u][0], py - positions[u][1], 1)
+                    fx += ax
+                    fy += ay
+    return fx, fy
+
+# --- Fruchterman-Reingold, pure Python; O(V^2) per iteration, or
+# O(V log V) with barnes_hut=True ---
+def force_layout_python(nodes, edges, iterations=50, width=WIDTH, height=HEIGHT, seed=None, positions=None, barnes_hut=False, progress=None):
+    positions = positions or initial_positions(nodes, width, height, seed)
+    k = math.sqrt((width * height) / len(nodes)) * 1.2
+    k2 = k * k
+    t = width / 10
+    depth = _tree_depth(len(nodes))
+
+    for i in range(iterations):
+        if progress: progress(i, iterations)
+        disp = {node: [0, 0] for node in nodes}
+        if barnes_hut:
+            tree = _quadtree_python(positions, nodes, depth)
+            for v in nodes: disp[v] = list(_repulsion_python(v, positions, k2, depth, tree))
+        else:
+            for v in nodes:
+                for u in nodes:
+                    if u != v:
+                        dx = positions[v][0] - positions[u][0]
+                        dy = positions[v][1] - positions[u][1]
+                        dist = math.sqrt(dx*dx + dy*dy)
+                        if dist < 0.01: dist = 0.01
+                        force = k2 / dist
+                        disp[v][0] += (dx / dist) * force
+                        disp[v][1] += (dy / dist) * force
+        for u, v, w in edges:
+            if u not in positions or v not in positions: continue
+            dx = positions[v][0] - positions[u][0]
+            dy = positions[v][1] - positions[u][1]
+            dist = math.sqrt(dx*dx + dy*dy)
+            if dist < 0.01: dist = 0.01
+            force = (dist * dist) / k
+            dx_norm = (dx / dist) * force
+            dy_norm = (dy / dist) * force
+            disp[v][0] -= dx_norm
+            disp[v][1] -= dy_norm
+            disp[u][0] += dx_norm
+            disp[u][1] += dy_norm
+        for v in nodes:
+            dx = disp[v][0]
+            dy = disp[v][1]
+            dist = math.sqrt(dx*dx + dy*dy)
+            if dist > 0:
+                limited_dist = min(dist, t)
+                positions[v][0] += (dx / dist) * limited_dist
+                positions[v][1] += (dy / dist) * limited_dist
+                positions[v][0] = min(width - MARGIN, max(MARGIN, positions[v][0]))
+                positions[v][1] = min(height - MARGIN, max(MARGIN, positions[v][1]))
+        t *= 0.95
+    return {node: (x, y) for node, (x, y) in positions.items()}
+
+def _quadtree_numpy(pos, depth):
+    lo = pos.min(axis=0)
+    size = max(float((pos.max(axis=0) - lo).max()), 1e-9)
+    side = 1 << depth
+    leaf = np.minimum(((pos - lo) * (side / size)).astype(np.intp), side - 1)
+    levels = [None]
+    for l in range(1, depth + 1):
+        key = ((leaf[:, 0] >> (depth - l)) << l) | (leaf[:, 1] >> (depth - l))
+        mass = np.bincount(key, minlength=1 << 2 * l)
+        sums = np.stack([np.bincount(key, weights=pos[:, axis], minlength=1 << 2 * l) for axis in (0, 1)], axis=1)
+        levels.append((key, mass, sums, size / (1 << l)))
+    order = np.argsort(levels[-1][0], kind='stable')
+    start = np.cumsum(levels[-1][1]) - levels[-1][1]
+    return levels, order, start
+
+def _repulsion_numpy(pos, k2, depth, tree, block, disp):
+    # The frontier holds (vertex, cell) pairs of one level at a time; the
+    # vertices go in blocks so it stays near max_block entries
+    levels, order, start = tree
+    n = len(pos)
+    theta2 = THETA * THETA
+    for b in range(0, n, block):
+        vi = np.repeat(np.arange(b, min(b + block, n)), 4)
+        cell = np.tile(np.arange(4), len(vi) // 4)
+        for l in range(1, depth + 1):
+            key, mass, sums, s = levels[l]
+            own = key[vi] == cell
+            m = mass[cell] - own
+            live = m > 0
+            vi, cell, own, m = vi[live], cell[live], own[live], m[live]
+            delta = pos[vi] - (sums[cell] - pos[vi] * own[:, None]) / m[:, None]
+            dist2 = np.einsum('ij,ij->i', delta, delta)
+            far = ~own & (dist2 * theta2 > s * s)
+            if l == depth: far |= m > LEAF_SIZE
+            push = delta[far] * (k2 * m[far] / np.maximum(dist2[far], 1e-4))[:, None]
+            for axis in (0, 1): disp[:, axis] += np.bincount(vi[far], weights=push[:, axis], minlength=n)
+            vi, cell = vi[~far], cell[~far]
+            if l < depth:
+                x, y = cell >> l, cell & ((1 << l) - 1)
+                vi = np.repeat(vi, 4)
+                cell = np.concatenate([(((2 * x + ox) << (l + 1)) | (2 * y + oy))[:, None] for ox in (0, 1) for oy in (0, 1)], axis=1).ravel()
+        # Opened leaves, each under LEAF_SIZE vertices: pairs one by one
+        cnt = levels[depth][1][cell]
+        src = np.repeat(vi, cnt)
+        dst = order[np.repeat(start[cell] - (np.cumsum(cnt) - cnt), cnt) + np.arange(cnt.sum())]
+        keep = src != dst
+        src, dst = src[keep], dst[keep]
+        delta = pos[src] - pos[dst]
+        push = delta * (k2 / np.maximum(np.einsum('ij,ij->i', delta, delta), 1e-4))[:, None]
+        for axis in (0, 1): disp[:, axis] += np.bincount(src, weights=push[:, axis], minlength=n)
+
+# --- Same model, NumPy-vectorised; exact repulsion is computed in row chunks
+# so the (chunk, V, 2) displacement block stays under max_block elements ---
+def force_layout_numpy(nodes, edges, iterations=50, width=WIDTH, height=HEIGHT, seed=None, positions=None, max_block=1 << 21, barnes_hut=False, progress=None):
+    positions = positions or initial_positions(nodes, width, height, seed)
+    nodes = list(nodes)
+    n = len(nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    pos = np.array([positions[node] for node in nodes], dtype=float)
+    pairs = [(index[u], index[v]) for u, v, w in edges if u in index and v in index]
+    eu = np.array([p[0] for p in pairs], dtype=np.intp)
+    ev = np.array([p[1] for p in pairs], dtype=np.intp)
+    k = math.sqrt((width * height) / n) * 1.2
+    k2 = k * k
+    t = width / 10
+    chunk = max(1, max_block // (2 * n))
+    depth = _tree_depth(n)
+
+    for i in range(iterations):
+        if progress: progress(i, iterations)
+        disp = np.zeros_like(pos)
+        if barnes_hut: _repulsion_numpy(pos, k2, depth, _quadtree_numpy(pos, depth), max(1, max_block // FRONTIER_PER_VERTEX), disp)
+        for s in range(0, n if not barnes_hut else 0, chunk):
+            delta = pos[s:s + chunk, None, :] - pos[None, :, :]
+            dist2 = np.maximum(np.einsum('ijk,ijk->ij', delta, delta), 1e-4)
+            disp[s:s + chunk] += np.einsum('ijk,ij->ik', delta, k2 / dist2)
+        if len(pairs):
+            delta = pos[ev] - pos[eu]
+            dist = np.maximum(np.sqrt(np.einsum('ij,ij->i', delta, delta)), 0.01)
+            pull = delta * (dist / k)[:, None]
+            for axis in (0, 1):
+                disp[:, axis] += np.bincount(eu, weights=pull[:, axis], minlength=n) - np.bincount(ev, weights=pull[:, axis], minlength=n)
+        length = np.sqrt(np.einsum('ij,ij->i', disp, disp))
+        moving = length > 0
+        step = np.minimum(length[moving], t) / length[moving]
+        pos[moving] += disp[moving] * step[:, None]
+        np.clip(pos[:, 0], MARGIN, width - MARGIN, out=pos[:, 0])
+        np.clip(pos[:, 1], MARGIN, height - MARGIN, out=pos[:, 1])
+        t *= 0.95
+    return {node: (float(x), float(y)) for node, (x, y) in zip(nodes, pos)}
+
+def resolve_method(method, node_count):
+    if method == 'auto': return 'barnes_hut' if node_count > BARNES_HUT_THRESHOLD else 'exact'
+    return method
+
+# `progress(i, iterations)` is called before each iteration; raising from it aborts the layout
+def force_layout(nodes, edges, iterations=50, width=WIDTH, height=HEIGHT, seed=None, method='auto', progress=None):
+    barnes_hut = resolve_method(method, len(nodes)) == 'barnes_hut'
+    if np is not None: return force_layout_numpy(nodes, edges, iterations, width, height, seed, barnes_hut=barnes_hut, progress=progress)
+    return force_layout_python(nodes, edges, iterations, width, height, seed, barnes_hut=barnes_hut, progress=progress)
+
+# --- Quality: spread of edge lengths (coefficient of variation) and the
+# share of crossing pairs among a random sample of edge pairs ---
+def _segments_cross(p1, p2, p3, p4):
+    def orient(a, b, c): return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    d1, d2 = orient(p3, p4, p1), orient(p3, p4, p2)
+    d3, d4 = orient(p1, p2, p3), orient(p1, p2, p4)
+    return d1 * d2 < 0 and d3 * d4 < 0
+
+def layout_quality(positions, edges, sample=5000, seed=0):
+    segments = [(positions[u], positions[v], u, v) for u, v, w in edges if u in positions and v in positions and u != v]
+    lengths = [math.dist(a, b) for a, b, u, v in segments]
+    if not lengths: return {'edge_cv': 0.0, 'crossing_rate': 0.0}
+    mean = sum(lengths) / len(lengths)
+    std = math.sqrt(sum((x - mean) ** 2 for x in lengths) / len(lengths))
+    rng = random.Random(seed)
+    crossings = tested = 0
+    for _ in range(sample if len(segments) > 1 else 0):
+        (a, b, u1, v1), (c, d, u2, v2) = rng.sample(segments, 2)
+        if {u1, v1} & {u2, v2}: continue
+        tested += 1
+        crossings += _segments_cross(a, b, c, d)
+    return {'edge_cv': std / mean if mean else 0.0, 'crossing_rate': crossings / tested if tested else 0.0}
+
+# --- On-disk layout cache: one file of float64 (x, y) pairs per key, in the
+# sorted node order; file mtimes serve as the LRU clock ---
+def layout_key(nodes, edges, iterations, method, width=WIDTH, height=HEIGHT):
+    # Weights and edge order do not affect the layout, so they stay out of the key
+    pairs = sorted(tuple(sorted((u, v))) for u, v, w in edges)
+    return hashlib.sha1(repr((sorted(nodes), pairs, iterations, method, width, height)).encode()).hexdigest()
+
+def seed_from_key(key):
+    return int(key[:8], 16)
+
+class LayoutCache:
+    def __init__(self, directory=CACHE_DIR, capacity=64):
+        self.directory = directory
+        self.capacity = capacity
+        self.hits = self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.layout')
+
+    def get(self, key, nodes):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f: coords = array('d', f.read())
+        except (OSError, ValueError):
+            coords = None
+        if coords is None or len(coords) != 2 * len(nodes):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return {node: (coords[2 * i], coords[2 * i + 1]) for i, node in enumerate(sorted(nodes))}
+
+    def put(self, key, nodes, positions):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(key), 'wb') as f:
+            array('d', [c for node in sorted(nodes) for c in positions[node]]).tofile(f)
+        self.evict()
+
+    def evict(self):
+        entries = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.layout')]
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:max(0, len(entries) - self.capacity)]: os.remove(path)
+
+    def clear(self):
+        if not os.path.isdir(self.directory): return
+        for name in os.listdir(self.directory):
+            if name.endswith('.layout'): os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,102 @@
+import warnings
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from graph import Graph
+
+CHUNK_SIZE = 1 << 22
+
+def _ints(line):
+    return list(map(int, line.split()))
+
+def _peek(f):
+    # A matrix has exactly as many non-empty lines as numbers on its first
+    # line, so reading at most len(first) + 1 lines is enough to tell.
+    lines = []
+    for line in f:
+        if not line.strip(): continue
+        lines.append(line)
+        if len(lines) > max(len(lines[0].split()), 1): break
+    return lines
+
+def _blocks(f, head, chunk_size):
+    # Yields byte blocks cut at line boundaries, carrying the partial last line over
+    tail = head
+    while True:
+        data = f.read(chunk_size)
+        if not data: break
+        data = tail + data
+        cut = data.rfind(b'\n') + 1
+        tail = data[cut:]
+        if cut: yield data[:cut]
+    if tail.strip(): yield tail + b'\n'
+
+def _matrix_edges(lines):
+    size = len(lines)
+    for r, line in enumerate(lines):
+        row = _ints(line)
+        if len(row) < size: raise ValueError(f"Dòng {r + 1} của ma trận thiếu phần tử")
+        for c in range(size):
+            if row[c] > 0: yield r + 1, c + 1, row[c]
+
+def parse_edges(block):
+    edges = []
+    for parts in map(bytes.split, block.split(b'\n')):
+        if len(parts) >= 2: edges.append((int(parts[0]), int(parts[1]), int(parts[2]) if len(parts) > 2 else 1))
+    return edges
+
+def parse_edges_numpy(block):
+    # Bulk-converts the whole block, then uses the newline positions to
+    # find each line's first token; lines with fewer than 2 numbers are skipped.
+    buf = np.frombuffer(block, dtype=np.uint8)
+    space = buf <= 32
+    starts = np.flatnonzero(~space & np.concatenate(([True], space[:-1])))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)
+        values = np.fromstring(block, dtype=np.int64, sep=' ')
+    if len(values) != len(starts): raise ValueError("File chứa giá trị không phải số nguyên")
+    line = np.searchsorted(np.flatnonzero(buf == 10), starts)
+    widths = np.bincount(line)
+    first = (np.cumsum(widths) - widths)[widths >= 2]
+    has_weight = widths[widths >= 2] > 2
+    weights = np.where(has_weight, values[np.minimum(first + 2, len(values) - 1)], 1)
+    return values[first], values[first + 1], weights
+
+def load_graph(path, directed=False, chunk_size=CHUNK_SIZE):
+    graph = Graph()
+    graph.directed = directed
+    with open(path, 'rb') as f:
+        lines = _peek(f)
+        if not lines: raise ValueError("File rỗng!")
+        first = _ints(lines[0])
+        if len(lines) > 1 and len(lines) == len(first):
+            graph.load_edges(_matrix_edges(lines), vertices=range(1, len(lines) + 1))
+            return graph
+        start = 1 if len(first) <= 2 and len(lines) > 1 else 0
+        blocks = _blocks(f, b''.join(lines[start:]), chunk_size)
+        if np is None:
+            graph.load_edges([edge for block in blocks for edge in parse_edges(block)])
+            return graph
+        parts = [parse_edges_numpy(block) for block in blocks]
+    if not parts: return graph
+    graph.load_arrays(*(np.concatenate(column) for column in zip(*parts)))
+    return graph
+
+def save_edge_list(path, graph):
+    edges = list(graph.edges())
+    with open(path, 'w') as f:
+        # With a single edge the "n m" header plus one line would read back as a 2x2 matrix
+        if len(edges) > 1: f.write(f"{len(graph.adj)} {len(edges)}\n")
+        f.writelines(f"{u} {v} {w}\n" for u, v, w in edges)
+
+def save_matrix(path, graph):
+    size = len(graph.adj)
+    if sorted(graph.adj) != list(range(1, size + 1)): raise ValueError("Ma trận kề cần các đỉnh được đánh số 1..n")
+    with open(path, 'w') as f:
+        for u in range(1, size + 1):
+            row = [0] * size
+            for v, w in graph.adj[u]: row[v - 1] = w
+            f.write(" ".join(map(str, row)) + "\n")
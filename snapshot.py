@@ -0,0 +1,112 @@
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from contextlib import contextmanager, suppress
+
+from csr import CSRAdjacency
+from graph import Graph
+
+# Layout: 32-byte header, then int64 ids[n], int64 offsets[n + 1],
+# int64 targets[nnz], int64|float64 weights[nnz] and, if flagged,
+# float64 positions[n][2] - all little-endian and 8-byte aligned.
+MAGIC = b'GRPH'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIQQ')
+DIRECTED, FLOAT_WEIGHTS, HAS_LAYOUT = 1, 2, 4
+
+def _column(values, typecode):
+    data = array(typecode, values)
+    if sys.byteorder != 'little': data.byteswap()
+    return data
+
+def save_snapshot(path, graph, positions=None):
+    # Written to a temporary file and renamed over `path`, so a mapping of the
+    # old file (possibly this very graph) never sees it truncated
+    if graph.frozen and getattr(graph.adj, 'snapshot_path', None) == os.path.abspath(path): close_snapshot(graph)
+    csr = graph.adj if graph.frozen else CSRAdjacency.from_adjacency(graph.adj)
+    if not all(isinstance(v, int) for v in csr.ids): raise ValueError("Snapshot chỉ hỗ trợ đỉnh là số nguyên")
+    float_weights = getattr(csr.weights, 'typecode', None) == 'd' or getattr(csr.weights, 'format', None) == 'd'
+    has_layout = positions is not None and all(v in positions for v in csr.ids)
+    flags = DIRECTED * graph.directed | FLOAT_WEIGHTS * float_weights | HAS_LAYOUT * has_layout
+    fd, temp = tempfile.mkstemp(suffix='.grph', dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, flags, 0, len(csr), csr.nnz))
+            f.write(_column(csr.ids, 'q'))
+            f.write(_column(csr.offsets, 'q'))
+            f.write(_column(csr.targets, 'q'))
+            f.write(_column(csr.weights, 'd' if float_weights else 'q'))
+            if has_layout: f.write(_column([c for v in csr.ids for c in positions[v]], 'd'))
+        os.replace(temp, path)
+    except BaseException:
+        os.remove(temp)
+        raise
+
+def _view(buf, offset, count, typecode):
+    view = buf[offset:offset + 8 * count].cast(typecode)
+    if sys.byteorder == 'little': return view
+    data = array(typecode, view)
+    data.byteswap()
+    return data
+
+def open_snapshot(path):
+    # The CSR arrays are memoryview casts over the mmap, so nothing is copied
+    # until a vertex is mutated (which thaws the graph into lists).
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, flags, _, n, nnz = HEADER.unpack_from(mm)
+    if magic != MAGIC or version != VERSION: raise ValueError("File không phải snapshot đồ thị (.grph) hợp lệ")
+    buf = memoryview(mm)
+    offset = HEADER.size
+    ids = _view(buf, offset, n, 'q')
+    offsets = _view(buf, offset + 8 * n, n + 1, 'q')
+    targets = _view(buf, offset + 8 * (2 * n + 1), nnz, 'q')
+    weights = _view(buf, offset + 8 * (2 * n + 1 + nnz), nnz, 'd' if flags & FLOAT_WEIGHTS else 'q')
+    positions = None
+    if flags & HAS_LAYOUT:
+        coords = _view(buf, offset + 8 * (2 * n + 1 + 2 * nnz), 2 * n, 'd')
+        positions = {v: (coords[2 * i], coords[2 * i + 1]) for i, v in enumerate(ids)}
+    graph = Graph()
+    graph.directed = bool(flags & DIRECTED)
+    graph.adj = CSRAdjacency(ids, offsets, targets, weights)
+    graph.adj.mmap, graph.adj.snapshot_path = mm, os.path.abspath(path)
+    return graph, positions
+
+def close_snapshot(graph, keep=True):
+    # Releases the mapping behind a graph from open_snapshot(). With keep the
+    # CSR columns are copied into memory first and the graph stays usable;
+    # otherwise it is cleared.
+    csr = graph.adj
+    mm = getattr(csr, 'mmap', None) if graph.frozen else None
+    if mm is None: return
+    # Paused cached searches are dropped; paused traces keep working, as CSR
+    # neighbour iteration reads the (swapped) columns by index
+    graph.touch()
+    columns = (csr.ids, csr.offsets, csr.targets, csr.weights)
+    if keep: csr.ids, csr.offsets, csr.targets, csr.weights = map(_copy, columns)
+    else: graph.clear()
+    csr.mmap = csr.snapshot_path = None
+    # Buffers still exported elsewhere (e.g. NumPy arrays over a column) keep
+    # the mapping alive until they are collected
+    for release in [c.release for c in columns if isinstance(c, memoryview)] + [mm.close]:
+        with suppress(BufferError): release()
+
+def _copy(column):
+    if not isinstance(column, memoryview): return column
+    data = array(column.format)
+    data.frombytes(column.tobytes())
+    return data
+
+@contextmanager
+def temporary_snapshot(graph):
+    # For handing a graph to worker processes, which open_snapshot() the path
+    fd, path = tempfile.mkstemp(suffix='.grph')
+    os.close(fd)
+    try:
+        save_snapshot(path, graph)
+        yield path
+    finally:
+        os.remove(path)
@@ -0,0 +1,78 @@
+import math
+from collections import defaultdict
+
+def quad_points(x1, y1, cx, cy, x2, y2, steps=16):
+    points = []
+    for i in range(steps + 1):
+        t = i / steps
+        a, b, c = (1 - t) ** 2, 2 * t * (1 - t), t * t
+        points.append((a * x1 + b * cx + c * x2, a * y1 + b * cy + c * y2))
+    return points
+
+def segment_distance(px, py, x1, y1, x2, y2):
+    dx, dy = x2 - x1, y2 - y1
+    length2 = dx * dx + dy * dy
+    t = 0 if length2 == 0 else max(0, min(1, ((px - x1) * dx + (py - y1) * dy) / length2))
+    return math.hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+
+def polyline_distance(px, py, points):
+    return min(segment_distance(px, py, *points[i], *points[i + 1]) for i in range(len(points) - 1))
+
+def polyline_boxes(points, pad=0):
+    # One box per segment, so a long diagonal edge only claims the cells it runs through
+    return [(min(a[0], b[0]) - pad, min(a[1], b[1]) - pad, max(a[0], b[0]) + pad, max(a[1], b[1]) + pad) for a, b in zip(points, points[1:])]
+
+class SpatialGrid:
+    # Uniform bucket grid: each key is registered in every cell its boxes
+    # overlap, so a point query only has to look at a single cell.
+    def __init__(self, cell=64):
+        self.cell = cell
+        self.cells = defaultdict(set)
+        self.where = {}
+
+    def _cells(self, box):
+        x0, y0, x1, y1 = box
+        c = self.cell
+        js = range(math.floor(y0 / c), math.floor(y1 / c) + 1)
+        return [(i, j) for i in range(math.floor(x0 / c), math.floor(x1 / c) + 1) for j in js]
+
+    def insert(self, key, boxes):
+        cells = self._cells(boxes[0]) if len(boxes) == 1 else {cell for box in boxes for cell in self._cells(box)}
+        grid = self.cells
+        for cell in cells: grid[cell].add(key)
+        self.where[key] = cells
+
+    def remove(self, key):
+        for cell in self.where.pop(key, ()):
+            bucket = self.cells[cell]
+            bucket.discard(key)
+            if not bucket: del self.cells[cell]
+
+    def move(self, key, boxes):
+        self.remove(key)
+        self.insert(key, boxes)
+
+    def query(self, x, y):
+        return self.cells.get((math.floor(x / self.cell), math.floor(y / self.cell)), ())
+
+    def query_rect(self, x0, y0, x1, y1, limit=None):
+        # Walks whichever is smaller - the covered cell range or the occupied cells -
+        # and stops once more than `limit` keys have been collected
+        c = self.cell
+        i0, i1, j0, j1 = math.floor(x0 / c), math.floor(x1 / c), math.floor(y0 / c), math.floor(y1 / c)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self.cells):
+            cells = [cell for cell in self.cells if i0 <= cell[0] <= i1 and j0 <= cell[1] <= j1]
+        else:
+            cells = [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1) if (i, j) in self.cells]
+        keys = set()
+        for cell in cells:
+            keys.update(self.cells[cell])
+            if limit is not None and len(keys) > limit: break
+        return keys
+
+    def clear(self):
+        self.cells.clear()
+        self.where.clear()
+
+    def __len__(self):
+        return len(self.where)
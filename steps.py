@@ -0,0 +1,268 @@
+import heapq
+from bisect import bisect_right
+from collections import deque
+
+from algorithms import describe_step
+
+CHECKPOINT_INTERVAL = 1000
+# Checkpoints may copy at most this many state entries per step between them
+CHECKPOINT_STATE_PER_STEP = 4
+PROGRESS_EVERY = 4096
+
+class Step:
+    __slots__ = ('op', 'u', 'v', 'value', 'line')
+
+    def __init__(self, op, u=None, v=None, value=None, line=-1):
+        self.op, self.u, self.v, self.value, self.line = op, u, v, value, line
+
+    def __repr__(self):
+        return f"Step({self.op!r}, {self.u!r}, {self.v!r}, {self.value!r}, {self.line})"
+
+class PathNode:
+    # Persistent parent-pointer path; the " -> " text is built on first
+    # str() and cached, reusing the nearest ancestor that already has one.
+    __slots__ = ('vertex', 'prev', 'text')
+
+    def __init__(self, vertex, prev=None):
+        self.vertex, self.prev, self.text = vertex, prev, None
+
+    def __str__(self):
+        if self.text is None:
+            parts = []
+            node = self
+            while node is not None and node.text is None:
+                parts.append(str(node.vertex))
+                node = node.prev
+            if node is not None: parts.append(node.text)
+            self.text = " -> ".join(reversed(parts))
+        return self.text
+
+    def to_list(self):
+        path = []
+        node = self
+        while node is not None:
+            path.append(node.vertex)
+            node = node.prev
+        path.reverse()
+        return path
+
+class TraceReplay:
+    # Rebuilds queue / PQ / stack / parent state by replaying step deltas,
+    # so text is only formatted for the step actually being displayed.
+    def __init__(self, algo):
+        self.algo = algo
+        self.paths = {}
+        self.queue = deque()
+        self.pq = []
+        self.stack = []
+        self.stack_paths = []
+        self.stack_text = (None, "[]")
+        self.current = None
+
+    def apply(self, step):
+        op, u, v = step.op, step.u, step.v
+        if self.algo == 'BFS':
+            if op == 'visit' and step.line == 0:
+                self.paths[u] = PathNode(u)
+                self.queue.append(u)
+                self.current = u
+            elif op == 'processing':
+                self.queue.popleft()
+                self.current = u
+            elif op == 'traverse':
+                self.paths[v] = PathNode(v, self.paths.get(u))
+                self.queue.append(v)
+        elif self.algo == 'DFS':
+            if op == 'processing' and step.line == 1:
+                self.stack_paths.append(PathNode(u, self.stack_paths[-1] if self.stack_paths else None))
+                self.stack.append(u)
+            elif op == 'visit' and step.line == 8:
+                self.stack_paths.pop()
+                self.stack.pop()
+        elif self.algo == 'Dijkstra':
+            if op == 'visit' and step.line == 0:
+                self.paths[u] = PathNode(u)
+                heapq.heappush(self.pq, (step.value, u))
+                self.current = u
+            elif op == 'processing':
+                heapq.heappop(self.pq)
+                self.current = u
+            elif op == 'traverse':
+                self.paths[v] = PathNode(v, self.paths.get(u))
+                heapq.heappush(self.pq, (step.value[1], v))
+
+    def current_path(self, step):
+        if self.algo == 'DFS': return self.stack_paths[-1] if self.stack_paths else None
+        if step.op == 'check_loop' and self.algo == 'Dijkstra':
+            return self.paths.get(self.pq[0][1]) if self.pq else None
+        return self.paths.get(self.current)
+
+    def path_text(self, step):
+        if self.algo == 'DFS' and step.op == 'not_found': return "[]"
+        path = self.current_path(step)
+        return str(path) if path is not None else ""
+
+    def struct_text(self, step):
+        if step.op.startswith('highlight_path'): return "Hoàn tất"
+        if step.op == 'not_found': return "[]"
+        if self.algo == 'BFS':
+            if step.op == 'visit' and step.line == 3: return "[]"
+            return str(list(self.queue))
+        if self.algo == 'DFS':
+            if step.op == 'visit' and step.line == 2: return "Hoàn tất"
+            top = self.stack_paths[-1] if self.stack_paths else None
+            if self.stack_text[0] is not top: self.stack_text = (top, str(self.stack))
+            return self.stack_text[1]
+        if step.op == 'visit' and step.line == 4: return "[]"
+        return str(sorted(self.pq))
+
+    def texts(self, step):
+        return describe_step(self.algo, step), self.path_text(step), self.struct_text(step)
+
+    def render(self, step):
+        self.apply(step)
+        return self.texts(step)
+
+    # PathNodes are immutable, so shallow copies are enough for a checkpoint
+    def snapshot(self):
+        return dict(self.paths), deque(self.queue), list(self.pq), list(self.stack), list(self.stack_paths), self.current
+
+    def state_size(self):
+        return len(self.paths) + len(self.queue) + len(self.pq) + len(self.stack)
+
+    def restore(self, state):
+        paths, queue, pq, stack, stack_paths, self.current = state
+        self.paths, self.queue, self.pq = dict(paths), deque(queue), list(pq)
+        self.stack, self.stack_paths = list(stack), list(stack_paths)
+        self.stack_text = (None, "[]")
+
+class StepStream:
+    # Pulls steps from a generator on demand through a bounded look-ahead
+    # buffer; the generator's return value (the path cost) lands in `result`.
+    def __init__(self, step_iter, lookahead=64):
+        self._iter = step_iter
+        self.lookahead = lookahead
+        self.buffer = deque()
+        self.exhausted = False
+        self.result = None
+        self.count = 0
+        self.last = None
+
+    def _fill(self):
+        while len(self.buffer) < self.lookahead and not self.exhausted:
+            try: self.buffer.append(next(self._iter))
+            except StopIteration as stop:
+                self.exhausted = True
+                self.result = stop.value
+
+    def next(self):
+        if not self.buffer: self._fill()
+        if not self.buffer: return None
+        self.last = self.buffer.popleft()
+        self.count += 1
+        return self.last
+
+    def has_next(self):
+        if not self.buffer: self._fill()
+        return bool(self.buffer)
+
+    def close(self):
+        self.buffer.clear()
+        if hasattr(self._iter, 'close'): self._iter.close()
+        self.exhausted = True
+
+def step_highlights(step):
+    # (kind, key, mode) changes a step makes to the drawing; edges keyed (u, v)
+    op, u, v = step.op, step.u, step.v
+    if op == 'processing': return (('node', u, 'processing'),)
+    if op == 'visit': return (('node', u, 'visited'),)
+    if op == 'traverse': return (('edge', (u, v), 'highlight'), ('node', v, 'processing'))
+    if op in ('backtrack', 'check_edge'): return (('edge', (u, v), 'highlight'),)
+    if op == 'highlight_path_node': return (('node', u, 'path'),)
+    if op == 'highlight_path_edge': return (('edge', (u, v), 'path'),)
+    return ()
+
+class TraceTimeline:
+    # Random access over a StepStream: steps are kept once pulled, and the
+    # node / edge modes plus the TraceReplay state are checkpointed. The gap
+    # after a checkpoint is at least `interval` steps and grows with the size
+    # of the state it copied, so checkpoints stay O(steps) in total instead of
+    # O(steps / interval * (V + E)); a seek replays at most
+    # max(interval, (V + E) / CHECKPOINT_STATE_PER_STEP) steps.
+    def __init__(self, stream, algo, edge_key=None, nodes=None, interval=CHECKPOINT_INTERVAL):
+        self.stream = stream
+        self.edge_key = edge_key or (lambda u, v: (u, v))
+        self.interval = interval
+        self.steps = []
+        self.position = 0
+        self.nodes, self.edges = dict(nodes or {}), {}
+        self.replay = TraceReplay(algo)
+        self.checkpoints, self.checkpoint_positions = [], []
+        self.checkpoint()
+
+    def snapshot(self):
+        return dict(self.nodes), dict(self.edges), self.replay.snapshot()
+
+    def checkpoint(self):
+        self.checkpoints.append(self.snapshot())
+        self.checkpoint_positions.append(self.position)
+        size = len(self.nodes) + len(self.edges) + self.replay.state_size()
+        self.next_checkpoint = self.position + max(self.interval, size // CHECKPOINT_STATE_PER_STEP)
+
+    def restore(self, index):
+        nodes, edges, replay = self.checkpoints[index]
+        self.nodes, self.edges = dict(nodes), dict(edges)
+        self.replay.restore(replay)
+        self.position = self.checkpoint_positions[index]
+
+    @property
+    def exhausted(self):
+        return not self.stream.has_next()
+
+    @property
+    def at_end(self):
+        return self.position == len(self.steps) and self.exhausted
+
+    def pull(self):
+        step = self.stream.next()
+        if step is not None: self.steps.append(step)
+        return step
+
+    # `progress(count)` is called every PROGRESS_EVERY pulled steps; raising from it stops the load
+    def load(self, n, progress=None):
+        while len(self.steps) < n and self.pull() is not None:
+            if progress and len(self.steps) % PROGRESS_EVERY == 0: progress(len(self.steps))
+        return min(n, len(self.steps))
+
+    def _advance(self):
+        step = self.steps[self.position]
+        for kind, key, mode in step_highlights(step):
+            if kind == 'node': self.nodes[key] = mode
+            else: self.edges[self.edge_key(*key)] = mode
+        self.replay.apply(step)
+        self.position += 1
+        if self.position == self.next_checkpoint: self.checkpoint()
+        return step
+
+    def step(self):
+        if self.load(self.position + 1) == self.position: return None
+        return self._advance()
+
+    def seek(self, n):
+        n = self.load(max(0, n))
+        index = bisect_right(self.checkpoint_positions, n) - 1
+        if n < self.position or self.checkpoint_positions[index] > self.position: self.restore(index)
+        while self.position < n: self._advance()
+        return self.current
+
+    @property
+    def current(self):
+        return self.steps[self.position - 1] if self.position else None
+
+    def find(self, predicate, progress=None):
+        # Index just past the next step at or after the current position that matches
+        i = self.position
+        while self.load(i + 1, progress) > i:
+            if predicate(self.steps[i]): return i + 1
+            i += 1
+        return None
@@ -0,0 +1,15 @@
+import os
+import random
+import sys
+
+# The modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph import Graph
+
+def random_graph(n, density=2, seed=0):
+    # n vertices and density * n random arcs weighted 1..9
+    rng = random.Random(seed)
+    graph = Graph()
+    graph.load_edges([(rng.randint(1, n), rng.randint(1, n), rng.randint(1, 9)) for _ in range(density * n)], vertices=range(1, n + 1))
+    return graph
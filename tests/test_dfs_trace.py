@@ -0,0 +1,78 @@
+import glob
+import os
+
+import pytest
+
+from algorithms import describe_step
+from graph import Graph
+from loader import parse_edges
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CASES = sorted(glob.glob(os.path.join(ROOT, 'test_cases_20nodes', 'graph_20nodes_case_*.txt')))
+
+def recursive_dfs(graph, start_node, end_node=None):
+    # The recursive trace iter_dfs replaced, reduced to (op, u, text, line)
+    steps = []
+    visited = set()
+    path_stack = []
+    total_nodes = len(graph.adj)
+
+    def visit(u):
+        visited.add(u)
+        path_stack.append(u)
+        steps.append(('processing', u, f"Xét đỉnh {u}", 1))
+        is_target_found = end_node is not None and u == end_node
+        if is_target_found or (end_node is None and len(visited) == total_nodes):
+            steps.append(('visit', u, f"Tìm thấy đích {u}!" if is_target_found else "Đã duyệt hết!", 2))
+            return True
+        if u in graph.adj:
+            for v, w in sorted(graph.adj[u], key=lambda x: x[0]):
+                steps.append(('check_edge', u, f"Xét {v}", 3))
+                if v not in visited:
+                    steps.append(('traverse', u, f"Đệ quy xuống {v}", 5))
+                    if visit(v): return True
+                    steps.append(('backtrack', u, f"Quay lui về {u}", 8))
+                    steps.append(('processing', u, f"Tiếp tục xét {u}", 3))
+                else:
+                    steps.append(('check_edge', u, f"{v} đã thăm -> Bỏ qua", 7))
+        path_stack.pop()
+        steps.append(('visit', u, f"Duyệt xong {u}", 8))
+        return False
+
+    cost = 0
+    if visit(start_node):
+        steps.append(('highlight_path_node', path_stack[0], "Tô màu đường đi", -1))
+        for u, v in zip(path_stack, path_stack[1:]):
+            steps.append(('highlight_path_edge', u, f"Đường đi: {u} -> {v}", -1))
+            steps.append(('highlight_path_node', v, "Tô màu đường đi", -1))
+        cost = graph.calculate_cost_from_stack(path_stack)
+    elif end_node is not None:
+        steps.append(('not_found', start_node, f"Không tìm thấy {end_node}!", 8))
+    return steps, cost
+
+def load_case(path, directed):
+    graph = Graph()
+    graph.directed = directed
+    with open(path, 'rb') as f:
+        for u, v, w in parse_edges(f.read()): graph.add_edge(u, v, w)
+    return graph
+
+def test_all_cases_present():
+    assert len(CASES) == 30
+
+@pytest.mark.parametrize('directed', [False, True])
+@pytest.mark.parametrize('path', CASES, ids=os.path.basename)
+def test_iter_dfs_matches_recursive_trace(path, directed):
+    graph = load_case(path, directed)
+    vertices = sorted(graph.adj)
+    for start in vertices:
+        for end in [None, max(vertices) + 1] + vertices:
+            steps, cost = graph.collect_steps(graph.iter_dfs(start, end))
+            assert ([(s.op, s.u, describe_step('DFS', s), s.line) for s in steps], cost) == recursive_dfs(graph, start, end)
+
+def test_iter_dfs_long_path():
+    graph = Graph()
+    graph.load_edges((i, i + 1, 1) for i in range(1, 5000))
+    steps, cost = graph.collect_steps(graph.iter_dfs(1, 5000))
+    assert cost == 4999
+    assert steps[-1].op == 'highlight_path_node' and steps[-1].u == 5000
@@ -0,0 +1,48 @@
+import glob
+import os
+import random
+
+import pytest
+
+from loader import load_graph
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CASES = sorted(glob.glob(os.path.join(ROOT, 'test_cases_20nodes', 'graph_20nodes_case_*.txt')))
+ALGORITHMS = ('bfs', 'dfs', 'dijkstra')
+
+def traced(graph, algo, start, end):
+    steps, cost = getattr(graph, algo)(start, end)
+    return [s.u for s in steps if s.op == 'highlight_path_node'], cost
+
+def fast(graph, algo, start, end):
+    return tuple(getattr(graph, algo + '_fast')(start, end)[-2:])
+
+def queries(graph, starts, targets):
+    # Targets from one source run back to back, so later ones hit the paused cached search
+    return [(start, end) for start in starts for end in [None] + targets]
+
+@pytest.mark.parametrize('directed', [False, True])
+@pytest.mark.parametrize('path', CASES, ids=os.path.basename)
+def test_fast_paths_match_traces(path, directed):
+    graph = load_graph(path, directed)
+    vertices = sorted(graph.adj)
+    for algo in ALGORITHMS:
+        for start, end in queries(graph, vertices, vertices):
+            assert fast(graph, algo, start, end) == traced(graph, algo, start, end), (algo, start, end)
+
+@pytest.mark.parametrize('directed', [False, True])
+def test_fast_paths_match_traces_graph_1000(directed):
+    graph = load_graph(os.path.join(ROOT, 'graph_1000.txt'), directed)
+    rng = random.Random(0)
+    vertices = sorted(graph.adj)
+    starts, targets = rng.sample(vertices, 3), rng.sample(vertices, 15)
+    for algo in ALGORITHMS:
+        for start, end in queries(graph, starts, targets):
+            assert fast(graph, algo, start, end) == traced(graph, algo, start, end), (algo, start, end)
+    # Edge edits repair the cached Dijkstra results rather than recomputing them
+    edges = list(graph.edges())
+    for u, v, w in rng.sample(edges, 20):
+        if rng.random() < 0.5: graph.remove_edge(u, v)
+        else: graph.add_edge(u, v, rng.randint(1, 20))
+        for start, end in queries(graph, starts[:1], targets[:5]):
+            assert fast(graph, 'dijkstra', start, end) == traced(graph, 'dijkstra', start, end), (u, v, start, end)
@@ -0,0 +1,34 @@
+import random
+
+import pytest
+
+import layout
+
+np = pytest.importorskip('numpy')
+
+def exact_repulsion(pos, k2):
+    delta = pos[:, None, :] - pos[None, :, :]
+    dist2 = np.maximum(np.einsum('ijk,ijk->ij', delta, delta), 1e-4)
+    return np.einsum('ijk,ij->ik', delta, k2 / dist2)
+
+def test_barnes_hut_close_to_exact_repulsion():
+    pos = np.random.default_rng(0).uniform(50, 1050, (1500, 2))
+    depth = layout._tree_depth(len(pos))
+    approx = np.zeros_like(pos)
+    # A small block forces several passes over the vertices
+    layout._repulsion_numpy(pos, 100.0, depth, layout._quadtree_numpy(pos, depth), 97, approx)
+    exact = exact_repulsion(pos, 100.0)
+    error = np.linalg.norm(approx - exact, axis=1) / np.linalg.norm(exact, axis=1).mean()
+    assert np.median(error) < 0.02
+
+def test_python_and_numpy_barnes_hut_agree():
+    rng = random.Random(1)
+    nodes = list(range(200))
+    positions = {v: [rng.uniform(50, 1050), rng.uniform(50, 650)] for v in nodes}
+    depth = layout._tree_depth(len(nodes))
+    tree = layout._quadtree_python(positions, nodes, depth)
+    python = np.array([layout._repulsion_python(v, positions, 100.0, depth, tree) for v in nodes])
+    pos = np.array([positions[v] for v in nodes])
+    vectorised = np.zeros_like(pos)
+    layout._repulsion_numpy(pos, 100.0, depth, layout._quadtree_numpy(pos, depth), len(pos), vectorised)
+    assert np.allclose(python, vectorised)
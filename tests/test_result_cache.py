@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from conftest import random_graph
+from graph import Graph
+
+@pytest.mark.parametrize('algo', ['bfs', 'dfs', 'dijkstra'])
+def test_returned_maps_do_not_grow(algo):
+    graph = random_graph(200, density=3)
+    fast = getattr(graph, algo + '_fast')
+    first = fast(1, 2)
+    maps = [dict(m) for m in first[:-2]]
+    for t in range(3, 201): fast(1, t)
+    assert [dict(m) for m in first[:-2]] == maps
+    assert graph.cache_info()['size'] == 1
+
+@pytest.mark.parametrize('algo', ['bfs', 'dfs', 'dijkstra'])
+def test_find_path_matches_fresh_search(algo):
+    graph = random_graph(200, density=3)
+    for t in range(1, 201):
+        fresh = Graph()
+        fresh.load_edges(list(graph.edges()), vertices=graph.adj)
+        assert graph.find_path(algo, 1, t) == getattr(fresh, algo + '_fast')(1, t)[-2:]
+
+def test_edit_leaves_returned_results_alone():
+    graph = Graph()
+    for u, v, w in [(1, 2, 1), (2, 3, 1), (1, 3, 5)]: graph.add_edge(u, v, w)
+    dist, parent, path, cost = graph.dijkstra_fast(1, 3)
+    graph.remove_edge(2, 3)
+    assert (dist[3], parent[3], path, cost) == (2, 2, [1, 2, 3], 2)
+    assert graph.dijkstra_fast(1, 3)[2:] == ([1, 3], 5)
+
+@pytest.mark.parametrize('directed', [False, True])
+def test_repaired_results_match_fresh_search(directed):
+    rng = random.Random(2)
+    graph = Graph()
+    graph.directed = directed
+    for _ in range(400): graph.add_edge(rng.randint(1, 100), rng.randint(1, 100), rng.randint(1, 9))
+    for _ in range(200):
+        before = graph.dijkstra_fast(1)
+        kept = dict(before[0]), dict(before[1])
+        edges = list(graph.edges())
+        if rng.random() < 0.4: graph.remove_edge(*rng.choice(edges)[:2])
+        else: graph.add_edge(rng.randint(1, 100), rng.randint(1, 100), rng.randint(1, 9))
+        assert before[:2] == kept
+        fresh = Graph()
+        fresh.directed = directed
+        for v in graph.adj: fresh.add_vertex(v)
+        for u, v, w in graph.edges(): fresh.add_edge(u, v, w)
+        assert graph.dijkstra_fast(1)[0] == fresh.dijkstra_fast(1)[0]
+        assert graph.find_path('dijkstra', 1, 50)[1] == fresh.find_path('dijkstra', 1, 50)[1]
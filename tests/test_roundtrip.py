@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from graph import Graph
+from loader import load_graph, parse_edges, save_edge_list, save_matrix
+from snapshot import close_snapshot, open_snapshot, save_snapshot
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def edge_set(graph):
+    return sorted((u, v, w) if graph.directed else (min(u, v), max(u, v), w) for u, v, w in graph.edges())
+
+def case_edges(name):
+    with open(os.path.join(ROOT, 'test_cases_20nodes', name), 'rb') as f: return parse_edges(f.read())
+
+GRAPHS = {
+    'one_edge': lambda: [(1, 2, 5)],
+    'case_1': lambda: case_edges('graph_20nodes_case_1.txt'),
+    'case_15': lambda: case_edges('graph_20nodes_case_15.txt'),
+}
+
+@pytest.fixture(params=[False, True], ids=['undirected', 'directed'])
+def graph(request):
+    def build(name):
+        graph = Graph()
+        graph.directed = request.param
+        for u, v, w in GRAPHS[name](): graph.add_edge(u, v, w)
+        return graph
+    return build
+
+def case():
+    return load_graph(os.path.join(ROOT, 'test_cases_20nodes', 'graph_20nodes_case_1.txt'))
+
+@pytest.mark.parametrize('name', GRAPHS)
+def test_edge_list_round_trip(tmp_path, graph, name):
+    g = graph(name)
+    path = str(tmp_path / 'edges.txt')
+    save_edge_list(path, g)
+    assert edge_set(load_graph(path, g.directed)) == edge_set(g)
+
+@pytest.mark.parametrize('name', GRAPHS)
+def test_matrix_round_trip(tmp_path, graph, name):
+    g = graph(name)
+    path = str(tmp_path / 'matrix.txt')
+    save_matrix(path, g)
+    assert edge_set(load_graph(path, g.directed)) == edge_set(g)
+
+@pytest.mark.parametrize('name', GRAPHS)
+def test_snapshot_round_trip(tmp_path, graph, name):
+    g = graph(name)
+    positions = {v: (float(v), 2.0 * v) for v in g.adj}
+    path = str(tmp_path / 'graph.grph')
+    save_snapshot(path, g, positions)
+    opened, opened_positions = open_snapshot(path)
+    assert opened.directed == g.directed
+    assert edge_set(opened) == edge_set(g)
+    assert opened_positions == positions
+    close_snapshot(opened, keep=False)
+
+def test_resave_opened_snapshot(tmp_path):
+    path = str(tmp_path / 'graph.grph')
+    g = case()
+    save_snapshot(path, g, {v: (1.0, 2.0) for v in g.adj})
+    opened, positions = open_snapshot(path)
+    other, _ = open_snapshot(path)
+    save_snapshot(path, opened, positions)
+    # Both the saved graph and another mapping of the old file stay readable
+    assert edge_set(opened) == edge_set(g) == edge_set(other)
+    reopened, reopened_positions = open_snapshot(path)
+    assert edge_set(reopened) == edge_set(g) and reopened_positions == positions
+    for snapshot in (other, reopened): close_snapshot(snapshot, keep=False)
+
+def test_close_snapshot_keeps_graph_usable(tmp_path):
+    path = str(tmp_path / 'graph.grph')
+    g = case()
+    save_snapshot(path, g)
+    opened, _ = open_snapshot(path)
+    close_snapshot(opened)
+    assert edge_set(opened) == edge_set(g)
+    assert opened.dijkstra_fast(1, 20)[3] == g.dijkstra_fast(1, 20)[3]
+
+@pytest.mark.parametrize('algo', ['iter_bfs', 'iter_dfs', 'iter_dijkstra'])
+def test_resave_with_paused_traversal(tmp_path, algo):
+    path = str(tmp_path / 'graph.grph')
+    g = case()
+    save_snapshot(path, g)
+    opened, _ = open_snapshot(path)
+    expected = [(s.op, s.u, s.v) for s in getattr(g, algo)(1)]
+    trace = getattr(opened, algo)(1)
+    steps = [next(trace) for _ in range(5)]
+    opened.dfs_fast(1, 2)
+    mapping = opened.adj.mmap
+    save_snapshot(path, opened)
+    assert mapping.closed
+    steps += list(trace)
+    assert [(s.op, s.u, s.v) for s in steps] == expected
+    assert opened.dfs_fast(1, 20)[1:] == g.dfs_fast(1, 20)[1:]
@@ -0,0 +1,28 @@
+import random
+
+from conftest import random_graph
+from steps import CHECKPOINT_STATE_PER_STEP, StepStream, TraceTimeline
+
+def state(timeline):
+    replay = timeline.replay
+    return dict(timeline.nodes), dict(timeline.edges), list(replay.queue), sorted(replay.pq), list(replay.stack), replay.current
+
+def test_seek_matches_linear_replay():
+    graph = random_graph(300)
+    for algo, steps in (('BFS', graph.iter_bfs(1)), ('DFS', graph.iter_dfs(1)), ('Dijkstra', graph.iter_dijkstra(1))):
+        linear = TraceTimeline(StepStream(steps), algo, interval=50)
+        states = [state(linear)]
+        while linear.step() is not None: states.append(state(linear))
+        rng = random.Random(1)
+        for k in [len(states) - 1, 0] + [rng.randrange(len(states)) for _ in range(100)]:
+            linear.seek(k)
+            assert state(linear) == states[k], (algo, k)
+
+def test_checkpoints_stay_linear_in_steps():
+    # Every vertex starts with a mode, the worst case for copying node modes
+    n = 3000
+    graph = random_graph(n)
+    timeline = TraceTimeline(StepStream(graph.iter_bfs(1)), 'BFS', nodes={v: 'normal' for v in graph.adj}, interval=100)
+    while timeline.step() is not None: pass
+    copied = sum(len(nodes) + len(edges) + len(replay[0]) for nodes, edges, replay in timeline.checkpoints)
+    assert copied <= CHECKPOINT_STATE_PER_STEP * len(timeline.steps) + 2 * n + len(timeline.edges)
@@ -0,0 +1,97 @@
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from layout import force_layout
+
+class Cancelled(Exception):
+    pass
+
+class TaskSignals(QObject):
+    progress = pyqtSignal(int, str)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+    cancelled = pyqtSignal()
+
+class Task(QRunnable):
+    # Runs fn(task, *args) on a QThreadPool thread. fn reports through
+    # report() and calls check() at safe points, which raises Cancelled once
+    # cancel() was called. The signals object belongs to the GUI thread, so
+    # results and progress arrive there as queued calls.
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn, self.args = fn, args
+        self.signals = TaskSignals()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check(self):
+        if self.cancel_event.is_set(): raise Cancelled()
+
+    # percent < 0 means the total is unknown
+    def report(self, percent, text=""):
+        self.signals.progress.emit(percent, text)
+
+    def run(self):
+        try: result = self.fn(self, *self.args)
+        except Cancelled: self.signals.cancelled.emit()
+        except Exception as e: self.signals.failed.emit(e)
+        else: self.signals.finished.emit(result)
+
+# --- Force layouts run in a worker process, out of reach of the GUI's GIL;
+# progress and cancellation cross over through a queue and an event that
+# the process receives once, when it starts ---
+_progress = _cancel = None
+
+def _init_layout_worker(progress, cancel):
+    global _progress, _cancel
+    _progress, _cancel = progress, cancel
+
+def _report_iteration(i, iterations):
+    if _cancel.is_set(): raise Cancelled()
+    _progress.put((i, iterations))
+
+def _layout_job(nodes, edges, iterations, seed, method):
+    return force_layout(nodes, edges, iterations, seed=seed, method=method, progress=_report_iteration)
+
+class LayoutPool:
+    def __init__(self):
+        self.executor = None
+
+    def start(self):
+        context = multiprocessing.get_context('spawn')
+        self.progress, self.cancel_event = context.Queue(), context.Event()
+        self.executor = ProcessPoolExecutor(1, mp_context=context, initializer=_init_layout_worker, initargs=(self.progress, self.cancel_event))
+
+    # Called from a Task thread: blocks until the layout is done, relaying progress
+    def run(self, task, nodes, edges, iterations, seed=None, method='auto'):
+        if self.executor is None: self.start()
+        while not self.progress.empty(): self.progress.get_nowait()
+        self.cancel_event.clear()
+        future = self.executor.submit(_layout_job, nodes, edges, iterations, seed, method)
+        while True:
+            if task.is_cancelled(): self.cancel_event.set()
+            try: i, total = self.progress.get(timeout=0.05)
+            except queue.Empty:
+                if future.done(): break
+            else: task.report(100 * i // total, f"Dàn trang: vòng {i + 1}/{total}")
+        try: return future.result()
+        except BrokenProcessPool:
+            self.executor = None
+            raise
+
+    def shutdown(self):
+        if self.executor is None: return
+        self.cancel_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = None